@@ -0,0 +1,202 @@
+# answer_cache.py
+import json
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+import numpy as np
+from utils import fold_text
+
+# Caché de respuestas de query_rag, en dos niveles:
+#   1. exacta: misma pregunta normalizada (sin acentos, mayúsculas ni signos)
+#      -> diccionario, sin embedding, sin FAISS y sin LLM
+#   2. semántica: pregunta casi igual (coseno del embedding >= umbral) y con
+#      los mismos números ("final de 2005" nunca reutiliza "final de 2006")
+# Cada entrada vale para un ámbito (k + filtros + tokens de contexto +
+# configuración de la recuperación) y un build del índice (build_id de
+# index_config.json): si el índice cambia, la caché se vacía.
+# Expulsión LRU por tamaño y por antigüedad (TTL). Con `path` se guarda en
+# SQLite y sobrevive entre ejecuciones.
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 24 * 3600        # segundos
+DEFAULT_SIMILARITY = 0.95
+
+_PUNCT = re.compile(r"[^\w\s]")
+_NUMBER = re.compile(r"\d+")
+
+def normalize_question(question):
+    return " ".join(_PUNCT.sub(" ", fold_text(question)).split())
+
+def question_numbers(question):
+    # Años, marcadores… deben coincidir para reutilizar una respuesta parecida
+    return " ".join(_NUMBER.findall(fold_text(question)))
+
+def scope_key(k, filters=None, context_tokens=None, retrieval=None):
+    # `retrieval`: modo, nprobe, efSearch, shards… (Retriever.settings())
+    scope = {"k": k, "filters": filters or {}, "context_tokens": context_tokens,
+             "retrieval": retrieval or {}}
+    return json.dumps(scope, sort_keys=True, ensure_ascii=False)
+
+def unit(vec):
+    vec = np.asarray(vec, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class AnswerCache:
+    def __init__(self, build_id, path=None, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL,
+                 similarity=DEFAULT_SIMILARITY):
+        self.build_id = build_id
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.entries = OrderedDict()      # (ámbito, pregunta normalizada) -> entrada, LRU al final
+        self.hits_exact = 0
+        self.hits_semantic = 0
+        self.hits_repeat = 0
+        self.misses = 0
+
+        self.conn = None
+        if path:
+            self.conn = sqlite3.connect(path)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "scope TEXT, question TEXT, build_id TEXT, numbers TEXT, answer TEXT, "
+                "sources TEXT, vec BLOB, created REAL, PRIMARY KEY (scope, question))"
+            )
+            self._load()
+
+    def _load(self):
+        # Lo de otros builds o caducado no se vuelve a usar: fuera del fichero
+        self.conn.execute("DELETE FROM answers WHERE build_id != ? OR created < ?",
+                          (self.build_id, time.time() - self.ttl))
+        self.conn.commit()
+        rows = self.conn.execute(
+            "SELECT scope, question, numbers, answer, sources, vec, created "
+            "FROM answers ORDER BY created"
+        )
+        for scope, question, numbers, answer, sources, vec, created in rows:
+            self.entries[(scope, question)] = {
+                "numbers": numbers,
+                "answer": answer,
+                "sources": json.loads(sources),
+                "vec": np.frombuffer(vec, dtype=np.float32) if vec else None,
+                "created": created,
+            }
+        self._evict()
+
+    def _expired(self, entry, now):
+        return now - entry["created"] > self.ttl
+
+    def _drop(self, keys):
+        for key in keys:
+            del self.entries[key]
+        if self.conn is not None and keys:
+            self.conn.executemany("DELETE FROM answers WHERE scope = ? AND question = ?", keys)
+            self.conn.commit()
+
+    def _evict(self):
+        now = time.time()
+        stale = [key for key, entry in self.entries.items() if self._expired(entry, now)]
+        overflow = len(self.entries) - len(stale) - self.max_entries
+        if overflow > 0:
+            expired = set(stale)
+            live = [key for key in self.entries if key not in expired]
+            stale += live[:overflow]
+        self._drop(stale)
+
+    def get(self, question, scope):
+        """Respuesta exacta (dict con answer/sources) o None. No cuenta fallos."""
+        key = (scope, normalize_question(question))
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry, time.time()):
+            self._drop([key])
+            return None
+        self.entries.move_to_end(key)
+        self.hits_exact += 1
+        return entry
+
+    def get_similar(self, question, scope, vec):
+        """Respuesta de la pregunta más parecida por embedding (>= umbral) o None."""
+        numbers = question_numbers(question)
+        candidates = [
+            (key, entry) for key, entry in self.entries.items()
+            if key[0] == scope and entry["numbers"] == numbers and entry["vec"] is not None
+        ]
+        if candidates:
+            sims = np.stack([entry["vec"] for _, entry in candidates]) @ unit(vec)
+            now = time.time()
+            expired = []
+            # De más a menos parecida: si la mejor ha caducado, vale la siguiente sobre el umbral
+            for best in np.argsort(-sims, kind="stable"):
+                if sims[best] < self.similarity:
+                    break
+                key, entry = candidates[best]
+                if self._expired(entry, now):
+                    expired.append(key)
+                    continue
+                self._drop(expired)
+                self.entries.move_to_end(key)
+                self.hits_semantic += 1
+                return entry
+            self._drop(expired)
+        self.misses += 1
+        return None
+
+    def count_repeat(self):
+        # Pregunta repetida dentro de un mismo lote (run_batch la contesta con
+        # el registro de la primera, sin pasar por la caché)
+        self.hits_repeat += 1
+
+    def lookup(self, question, scope, encode=None):
+        # Exacta y, si no hay, semántica (solo entonces se calcula el embedding)
+        entry = self.get(question, scope)
+        if entry is not None or encode is None:
+            if entry is None:
+                self.misses += 1
+            return entry, None
+        vec = encode(question)
+        return self.get_similar(question, scope, vec), vec
+
+    def put(self, question, scope, answer, sources=None, vec=None):
+        key = (scope, normalize_question(question))
+        entry = {
+            "numbers": question_numbers(question),
+            "answer": answer,
+            "sources": sources or [],
+            "vec": unit(vec) if vec is not None else None,
+            "created": time.time(),
+        }
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if self.conn is not None:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, self.build_id, entry["numbers"], answer,
+                 json.dumps(entry["sources"], ensure_ascii=False),
+                 entry["vec"].tobytes() if entry["vec"] is not None else None, entry["created"]),
+            )
+            self.conn.commit()
+        self._evict()
+
+    def clear(self):
+        self._drop(list(self.entries))
+
+    def stats(self):
+        hits = self.hits_exact + self.hits_semantic + self.hits_repeat
+        lookups = hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits_exact": self.hits_exact,
+            "hits_semantic": self.hits_semantic,
+            "hits_repeat": self.hits_repeat,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
@@ -0,0 +1,185 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+SRC_DIR = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, ROOT)
+
+import scraping_utils  # noqa: E402
+from fixture_server import CORPUS_DIR, FixtureServer  # noqa: E402
+from pipeline import SCRAPERS  # noqa: E402
+
+# Benchmark de los scrapers contra el servidor local de fixtures, sin red.
+#
+# Por cada scraper:
+#   1. Refresco completo: el script tal cual (subproceso, caché HTTP vacía)
+#      contra el servidor, con la latencia/429 que se pidan. Da el tiempo
+#      extremo a extremo y las peticiones por segundo.
+#   2. Parseo: el mismo script en modo --offline leyendo el corpus como caché
+#      (en este proceso, sin arrancar Python ni tocar la red). Todo lo que
+#      queda es parseo + DataFrames + CSV; dividido entre las páginas da el
+#      tiempo de parseo por página.
+# Los CSV y el estado se escriben en directorios temporales: data/ no se toca.
+
+DEFAULT_SEASONS = (2021, 2023)
+
+
+def scraper_args(name, seasons, offline=False):
+    args = ["--offline"] if offline else []
+    if SCRAPERS[name]["seasons"]:
+        args += ["--from-season", str(seasons[0]), "--to-season", str(seasons[1])]
+    return args
+
+
+def scraper_script(name):
+    return os.path.join(SRC_DIR, f"{name}.py")
+
+
+def run_scraper(name, seasons, env_overrides, log_path=None):
+    """Ejecuta el scraper en un subproceso con cwd temporal; devuelve (código, segundos)."""
+    env = {**os.environ, "PYTHONIOENCODING": "utf-8", **env_overrides}
+    with tempfile.TemporaryDirectory() as workdir:
+        log = open(log_path, "w", encoding="utf-8") if log_path else subprocess.DEVNULL
+        try:
+            t0 = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, scraper_script(name)] + scraper_args(name, seasons),
+                cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+            return proc.returncode, time.perf_counter() - t0
+        finally:
+            if log_path:
+                log.close()
+
+
+def run_offline_in_process(name, seasons, corpus_dir):
+    """El scraper en modo --offline sobre el corpus, en este proceso; devuelve segundos."""
+    old_argv, old_cwd, old_cache = sys.argv, os.getcwd(), scraping_utils.HTTP_CACHE_DIR
+    scraping_utils.HTTP_CACHE_DIR = corpus_dir
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            os.chdir(workdir)
+            sys.argv = [scraper_script(name)] + scraper_args(name, seasons, offline=True)
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                runpy.run_path(scraper_script(name), run_name="__main__")
+                return time.perf_counter() - t0
+        finally:
+            sys.argv = old_argv
+            os.chdir(old_cwd)
+            scraping_utils.HTTP_CACHE_DIR = old_cache
+            scraping_utils.set_offline(False)
+
+
+def bench_scraper(name, server, seasons, corpus_dir, log_dir=None):
+    before = server.snapshot()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        log_path = os.path.join(log_dir, f"{name}.log") if log_dir else None
+        code, e2e = run_scraper(name, seasons, {
+            "UCL_HTTP_UPSTREAM": server.base_url,
+            "UCL_HTTP_CACHE": cache_dir,
+        }, log_path)
+    after = server.snapshot()
+    delta = {k: after[k] - before[k] for k in after}
+
+    parse = run_offline_in_process(name, seasons, corpus_dir)
+    pages = delta["served"]
+    return {
+        "scraper": name,
+        "ok": code == 0,
+        "requests": delta["requests"],
+        "pages": pages,
+        "throttled": delta["throttled"],
+        "missing": delta["missing"],
+        "mb": delta["bytes"] / 1e6,
+        "e2e_s": e2e,
+        "req_per_s": delta["requests"] / e2e if e2e else 0.0,
+        "offline_s": parse,
+        "parse_ms_per_page": 1000 * parse / pages if pages else None,
+    }
+
+
+def print_report(results, settings):
+    print(f"\n⏱️  Scrapers contra fixtures ({settings})")
+    header = (f"  {'scraper':<38} {'pág':>5} {'429':>4} {'404':>4} {'MB':>6} "
+              f"{'e2e s':>7} {'req/s':>6} {'offl s':>7} {'ms/pág':>7}")
+    print(header)
+    for r in results:
+        per_page = f"{r['parse_ms_per_page']:.1f}" if r["parse_ms_per_page"] is not None else "-"
+        flag = "" if r["ok"] else "  ❌"
+        print(f"  {r['scraper']:<38} {r['pages']:>5} {r['throttled']:>4} {r['missing']:>4} "
+              f"{r['mb']:>6.2f} {r['e2e_s']:>7.2f} {r['req_per_s']:>6.1f} "
+              f"{r['offline_s']:>7.2f} {per_page:>7}{flag}")
+    total_pages = sum(r["pages"] for r in results)
+    total_e2e = sum(r["e2e_s"] for r in results)
+    total_offline = sum(r["offline_s"] for r in results)
+    print(f"  {'total (en serie)':<38} {total_pages:>5} {'':>4} {'':>4} {'':>6} "
+          f"{total_e2e:>7.2f} {'':>6} {total_offline:>7.2f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark offline de los scrapers contra fixtures locales")
+    parser.add_argument("scrapers", nargs="*", metavar="SCRAPER",
+                        help="Scrapers a medir (por defecto, todos)")
+    parser.add_argument("--corpus", default=CORPUS_DIR,
+                        help="Corpus grabado (ver bench/record_corpus.py)")
+    parser.add_argument("--from-season", type=int, default=DEFAULT_SEASONS[0])
+    parser.add_argument("--to-season", type=int, default=DEFAULT_SEASONS[1])
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--p429", type=float, default=0.0,
+                        help="Probabilidad de 429 por petición")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--logs", default=None, help="Directorio para la salida de cada scraper")
+    parser.add_argument("--json", default=None, help="Guardar los resultados en este fichero")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    names = args.scrapers or list(SCRAPERS)
+    unknown = set(names) - set(SCRAPERS)
+    if unknown:
+        raise SystemExit(f"Scrapers desconocidos: {', '.join(sorted(unknown))}")
+    if not os.path.isdir(args.corpus):
+        raise SystemExit(f"No existe el corpus {args.corpus}: grábalo con bench/record_corpus.py")
+    if args.logs:
+        os.makedirs(args.logs, exist_ok=True)
+
+    seasons = (args.from_season, args.to_season)
+    server = FixtureServer(
+        corpus_dir=args.corpus, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        p429=args.p429, retry_after=args.retry_after,
+    )
+    server.start()
+    try:
+        results = []
+        for name in names:
+            print(f"▶️  {name}")
+            results.append(bench_scraper(name, server, seasons, args.corpus, args.logs))
+    finally:
+        server.stop()
+
+    settings = (f"temporadas {seasons[0]}-{seasons[1]}, latencia {args.latency_ms:g}±{args.jitter_ms:g} ms, "
+                f"p429={args.p429:g}")
+    print_report(results, settings)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
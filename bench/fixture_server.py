@@ -0,0 +1,163 @@
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from scraping_utils import cache_key, read_cache  # noqa: E402
+from synthetic import synthesize  # noqa: E402
+
+# Servidor HTTP local que hace de Transfermarkt, Wikipedia y compstats UEFA.
+#
+# Los scrapers llegan aquí con UCL_HTTP_UPSTREAM=http://127.0.0.1:PUERTO:
+# fetch() pide https://host/ruta?query como /host/ruta?query. La respuesta
+# sale del corpus grabado, que tiene el mismo formato que la caché HTTP de
+# scraping_utils (misma clave cache_key(url, params)), con latencia y 429
+# configurables. Con synthesize=True, lo que no está en el corpus se inventa
+# (bench/synthetic.py): así se graba el corpus sin red.
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), corpus_dir=CORPUS_DIR,
+                 latency_ms=0.0, jitter_ms=0.0, p429=0.0, retry_after=1,
+                 synthesize=False, seed=0):
+        super().__init__(address, FixtureHandler)
+        self.corpus_dir = corpus_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.p429 = p429
+        self.retry_after = retry_after
+        self.synthesize = synthesize
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "served": 0, "throttled": 0, "missing": 0, "bytes": 0}
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, **deltas):
+        with self._lock:
+            for name, n in deltas.items():
+                self.counts[name] += n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def draw(self):
+        # (segundos de latencia, ¿responder 429?) para una petición
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            throttle = self._rng.random() < self.p429
+        return delay, throttle
+
+    def lookup(self, url: str, params: dict):
+        """(content_type, cuerpo) de la petición, o None si no está en el corpus."""
+        cached = read_cache(cache_key(url, params), self.corpus_dir)
+        if cached:
+            meta, body = cached
+            return meta["headers"].get("Content-Type", "text/html"), body
+        if self.synthesize:
+            return synthesize(url, params)
+        return None
+
+    def start(self):
+        """Sirve en un hilo de fondo y devuelve la URL base."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, como los hosts reales
+
+    def do_GET(self):
+        srv = self.server
+        srv.count(requests=1)
+
+        # /host/ruta?query -> https://host/ruta + params
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        url = f"https://{host}/{unquote(path)}"
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+
+        delay, throttle = srv.draw()
+        if delay:
+            time.sleep(delay)
+
+        if throttle:
+            srv.count(throttled=1)
+            self.respond(429, b"Too Many Requests", "text/plain",
+                         {"Retry-After": str(srv.retry_after)})
+            return
+
+        found = srv.lookup(url, params)
+        if found is None:
+            srv.count(missing=1)
+            self.respond(404, f"Sin fixture: {url}".encode("utf-8"), "text/plain; charset=utf-8")
+            return
+
+        content_type, body = found
+        srv.count(served=1, bytes=len(body))
+        self.respond(200, body, content_type)
+
+    def respond(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Sin una línea por petición: las cuentas van en srv.counts
+        pass
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Servidor local de fixtures para los scrapers")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="Directorio del corpus grabado")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia media por respuesta")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Variación (+/-) de la latencia")
+    parser.add_argument("--p429", type=float, default=0.0,
+                        help="Probabilidad de responder 429 Too Many Requests")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After de los 429 (s)")
+    parser.add_argument("--synthesize", action="store_true",
+                        help="Inventar las respuestas que no estén en el corpus")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = FixtureServer(
+        ("127.0.0.1", args.port), corpus_dir=args.corpus,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        p429=args.p429, retry_after=args.retry_after, synthesize=args.synthesize,
+    )
+    print(f"🧪 Fixtures en {server.base_url}  (corpus: {args.corpus})")
+    print(f"   export UCL_HTTP_UPSTREAM={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n📊 {server.snapshot()}")
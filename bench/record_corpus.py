@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+
+from bench_scrapers import DEFAULT_SEASONS, SCRAPERS, run_scraper
+from fixture_server import CORPUS_DIR, FixtureServer
+
+# Graba el corpus de fixtures: cada scraper se ejecuta con la caché HTTP
+# apuntando al corpus, así que lo que descarga queda guardado con el mismo
+# formato y las mismas claves que sirve bench/fixture_server.py.
+#
+#   python bench/record_corpus.py              -> páginas reales (con red)
+#   python bench/record_corpus.py --synthetic  -> respuestas inventadas con
+#                                                 la forma de las reales (sin red)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Graba el corpus de fixtures de los scrapers")
+    parser.add_argument("scrapers", nargs="*", metavar="SCRAPER",
+                        help="Scrapers a grabar (por defecto, todos)")
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--from-season", type=int, default=DEFAULT_SEASONS[0])
+    parser.add_argument("--to-season", type=int, default=DEFAULT_SEASONS[1])
+    parser.add_argument("--synthetic", action="store_true",
+                        help="No salir a la red: respuestas sintéticas (bench/synthetic.py)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    names = args.scrapers or list(SCRAPERS)
+    seasons = (args.from_season, args.to_season)
+    os.makedirs(args.corpus, exist_ok=True)
+
+    server = None
+    env = {"UCL_HTTP_CACHE": os.path.abspath(args.corpus)}
+    if args.synthetic:
+        server = FixtureServer(corpus_dir=args.corpus, synthesize=True)
+        env["UCL_HTTP_UPSTREAM"] = server.start()
+
+    failed = []
+    try:
+        for name in names:
+            code, elapsed = run_scraper(name, seasons, env)
+            print(f"{'✅' if code == 0 else '❌'} {name} ({elapsed:.1f}s)")
+            if code != 0:
+                failed.append(name)
+    finally:
+        if server:
+            server.stop()
+
+    entries = sum(f.endswith(".body") for _, _, files in os.walk(args.corpus) for f in files)
+    print(f"\n📦 Corpus en {args.corpus}: {entries} respuestas")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+import json
+import random
+import re
+import zlib
+from html import escape
+
+# Respuestas sintéticas con la misma forma que las páginas reales que piden
+# los scrapers de src/ (tablas `items` de Transfermarkt, tablas de partidos de
+# Wikipedia y JSON de compstats). Sirven para grabar un corpus de fixtures sin
+# red: el contenido es inventado pero determinista (misma URL -> mismo cuerpo).
+
+TM_ROWS_PER_PAGE = 25
+TM_SEASON_PAGES = 4          # páginas de scorerliste / torschuetzenliste
+TM_ALLTIME_ROWS = 250
+UEFA_PLAYERS_PER_SEASON = 520
+UEFA_TEAMS_PER_SEASON = 32
+WIKI_MATCH_TABLES = 16
+
+FIRST = ["Luca", "Karim", "Sergio", "Thomas", "Kevin", "João", "Mohamed", "Erling",
+         "Robert", "Ángel", "Jude", "Vinícius", "Harry", "Antoine", "Pedro", "Marco"]
+LAST = ["Müller", "Benzema", "Ramos", "Silva", "Salah", "Haaland", "Lewandowski",
+        "Di María", "Bellingham", "Júnior", "Kane", "Griezmann", "González", "Reus"]
+CLUBS = ["Real Madrid", "FC Barcelona", "Bayern Múnich", "Manchester City", "Liverpool FC",
+         "Juventus", "AC Milan", "Inter", "Paris Saint-Germain", "Borussia Dortmund",
+         "Atlético de Madrid", "FC Porto", "SL Benfica", "Ajax", "Chelsea FC", "Arsenal FC"]
+COUNTRIES = ["España", "Alemania", "Francia", "Inglaterra", "Italia", "Portugal",
+             "Brasil", "Argentina", "Países Bajos", "Noruega", "Polonia", "Egipto"]
+POSITIONS = ["Portero", "Defensa central", "Lateral derecho", "Pivote",
+             "Mediocentro ofensivo", "Extremo izquierdo", "Delantero centro"]
+
+
+def rng_for(url: str, params=None) -> random.Random:
+    key = url + "?" + json.dumps(sorted((params or {}).items()))
+    return random.Random(zlib.crc32(key.encode("utf-8")))
+
+
+# ---------------------------------------------------------------------------
+# Transfermarkt
+# ---------------------------------------------------------------------------
+
+def _player_name(rng):
+    return f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+
+
+def td_player(rng, with_title=True):
+    name = _player_name(rng)
+    pid = rng.randrange(1000, 999999)
+    title = f' title="{escape(name)}"' if with_title else ""
+    return (
+        '<td class="hauptlink"><table class="inline-table"><tr>'
+        f'<td rowspan="2"><img src="/portrait/{pid}.jpg" title="{escape(name)}" class="bilderrahmen-fixed"/></td>'
+        f'<td class="hauptlink"><a{title} href="/{name.lower().replace(" ", "-")}/profil/spieler/{pid}">{escape(name)}</a></td>'
+        f'</tr><tr><td>{rng.choice(POSITIONS)}</td></tr></table></td>'
+    )
+
+
+def td_club(rng, with_text=True):
+    club = rng.choice(CLUBS)
+    cid = CLUBS.index(club) + 1
+    label = escape(club) if with_text else f'<img src="/wappen/{cid}.png" alt="{escape(club)}"/>'
+    return (f'<td class="zentriert"><a title="{escape(club)}" '
+            f'href="/{club.lower().replace(" ", "-")}/startseite/verein/{cid}">{label}</a></td>')
+
+
+def td_crest(rng):
+    return f'<td class="zentriert"><img src="/wappen/{rng.randrange(1, 99)}.png" alt=""/></td>'
+
+
+def td_flags(rng):
+    countries = rng.sample(COUNTRIES, rng.choice([1, 1, 1, 2]))
+    imgs = "<br/>".join(
+        f'<img src="/flagge/{i}.png" title="{c}" alt="{c}" class="flaggenrahmen"/>'
+        for i, c in enumerate(countries)
+    )
+    return f'<td class="zentriert">{imgs}</td>'
+
+
+def td_num(value, thousands=False):
+    text = f"{value:,}".replace(",", ".") if thousands else str(value)
+    return f'<td class="zentriert">{text}</td>'
+
+
+def tm_page(rows, pagination_pages=None):
+    body = "".join(
+        f'<tr class="{"odd" if i % 2 == 0 else "even"}">{cells}</tr>'
+        for i, cells in enumerate(rows)
+    )
+    pager = ""
+    if pagination_pages:
+        links = "".join(
+            f'<li class="tm-pagination__list-item"><a href="#" class="tm-pagination__link">{p}</a></li>'
+            for p in range(1, pagination_pages + 1)
+        )
+        pager = f'<div class="pager"><ul class="tm-pagination">{links}<li><a title="Página siguiente">›</a></li></ul></div>'
+    return (
+        '<!DOCTYPE html><html lang="es"><head><meta charset="utf-8"/><title>UEFA Champions League</title>'
+        '<script>window.dataLayer = [];</script></head><body>'
+        '<div class="box"><div class="responsive-table"><div class="grid-view">'
+        '<table class="items"><thead><tr><th>#</th><th>Jugador</th></tr></thead>'
+        f'<tbody>{body}</tbody></table></div></div>{pager}</div>'
+        '<footer><table class="footer-links"><tbody><tr><td>Aviso legal</td></tr></tbody></table></footer>'
+        '</body></html>'
+    )
+
+
+def tm_fairplay(rng):
+    rows = []
+    for rank in range(1, 33):
+        rows.append(
+            td_num(rank) + td_crest(rng) + td_club(rng) +
+            "".join(td_num(rng.randrange(0, 30)) for _ in range(4)) +
+            td_num(rng.randrange(0, 90))
+        )
+    return tm_page(rows)
+
+
+def tm_scorerlist(rng, page):
+    rows = []
+    for i in range(TM_ROWS_PER_PAGE):
+        goals, assists = rng.randrange(0, 15), rng.randrange(0, 10)
+        rows.append(
+            td_num((page - 1) * TM_ROWS_PER_PAGE + i + 1) + td_player(rng) + td_club(rng, with_text=False) +
+            td_flags(rng) + td_num(rng.randrange(17, 38)) + td_num(rng.randrange(1, 14)) +
+            td_num(goals) + td_num(assists) + td_num(goals + assists)
+        )
+    return tm_page(rows, TM_SEASON_PAGES)
+
+
+def tm_goalscorers(rng, page):
+    rows = []
+    for i in range(TM_ROWS_PER_PAGE):
+        rows.append(
+            td_num((page - 1) * TM_ROWS_PER_PAGE + i + 1) + td_player(rng) + td_flags(rng) +
+            td_num(rng.randrange(17, 38)) + td_club(rng, with_text=False) +
+            td_num(rng.randrange(1, 14)) + td_num(rng.randrange(1, 15))
+        )
+    return tm_page(rows, TM_SEASON_PAGES)
+
+
+def tm_alltime_table(rng):
+    rows = []
+    for rank in range(1, TM_ALLTIME_ROWS + 1):
+        w, d, l = rng.randrange(0, 300), rng.randrange(0, 90), rng.randrange(0, 120)
+        rows.append(
+            td_num(rank) + td_crest(rng) + td_club(rng) + td_num(w + d + l) + td_num(w) +
+            td_num(d) + td_num(l) + td_num(rng.randrange(-80, 500)) + td_num(3 * w + d)
+        )
+    return tm_page(rows)
+
+
+def tm_finals(rng):
+    rows = []
+    for year in range(2024, 1955, -1):
+        score = f"{rng.randrange(5)}:{rng.randrange(5)}"
+        if rng.random() < 0.15:
+            score += f" ({rng.randrange(2, 6)}:{rng.randrange(2, 6)} pen)"
+        rows.append(
+            f'<td class="zentriert">{year % 100:02d}/{(year + 1) % 100:02d}</td>' + td_club(rng) +
+            td_crest(rng) + f'<td class="zentriert"><a href="/spielbericht/index/spielbericht/{year}">{score}</a></td>' +
+            td_crest(rng) + td_club(rng)
+        )
+    return tm_page(rows)
+
+
+def tm_record_players(rng):
+    rows = []
+    for rank in range(1, TM_ALLTIME_ROWS + 1):
+        clubs = rng.choice(["", f"Para {rng.randrange(2, 6)} clubes"])
+        rows.append(
+            td_num(rank) + td_player(rng) + td_flags(rng) +
+            (f'<td class="zentriert">{clubs}</td>' if clubs else td_club(rng)) +
+            td_num(rng.randrange(1000, 16000), thousands=True) + td_num(rng.randrange(0, 140)) +
+            td_num(rng.randrange(20, 190))
+        )
+    return tm_page(rows)
+
+
+def tm_alltime_scorers(rng):
+    rows = []
+    for rank in range(1, TM_ALLTIME_ROWS + 1):
+        rows.append(
+            td_num(rank) + td_player(rng) + f'<td class="zentriert">Para {rng.randrange(1, 6)} clubes</td>' +
+            td_flags(rng) + td_num(rng.randrange(20, 45)) + td_num(rng.randrange(1, 20)) +
+            td_num(rng.randrange(20, 190)) + td_num(rng.randrange(5, 140))
+        )
+    return tm_page(rows)
+
+
+# ---------------------------------------------------------------------------
+# Wikipedia
+# ---------------------------------------------------------------------------
+
+def wiki_table(header, rows, cls="wikitable"):
+    head = "".join(f"<th>{escape(h)}</th>" for h in header)
+    body = "".join("<tr>" + "".join(f"<td>{escape(str(c))}</td>" for c in r) + "</tr>" for r in rows)
+    return f'<table class="{cls}"><tbody><tr>{head}</tr>{body}</tbody></table>'
+
+
+def wiki_season(rng, title):
+    parts = [f"<h1>{escape(title.replace('_', ' '))}</h1>",
+             wiki_table(["Infobox", ""], [["Dates", "September – May"], ["Teams", "32"]], cls="infobox")]
+    for n in range(WIKI_MATCH_TABLES):
+        # Clasificación de grupo (no es tabla de partidos) + sus partidos
+        parts.append(f"<h3>Group {chr(65 + n % 8)}</h3>")
+        parts.append(wiki_table(
+            ["Pos", "Team", "Pld", "W", "D", "L", "GF", "GA", "GD", "Pts"],
+            [[p, rng.choice(CLUBS), 6, *(rng.randrange(7) for _ in range(6)), rng.randrange(19)]
+             for p in range(1, 5)],
+        ))
+        rows = []
+        for _ in range(6):
+            score = f"{rng.randrange(5)}–{rng.randrange(5)}"
+            if rng.random() < 0.05:
+                score += rng.choice([" (a.e.t.)", " (pens 4–3)"])
+            rows.append([f"{rng.randrange(1, 28)} October", rng.choice(CLUBS), score, rng.choice(CLUBS)])
+        parts.append(wiki_table(["Date", "Home team", "Score", "Away team"], rows))
+    return (
+        '<!DOCTYPE html><html><head><meta charset="UTF-8"/><title>' + escape(title) + '</title></head>'
+        '<body><div id="mw-content-text">' + "".join(parts) + "</div></body></html>"
+    )
+
+
+# ---------------------------------------------------------------------------
+# compstats UEFA
+# ---------------------------------------------------------------------------
+
+def uefa_team(rng):
+    club = rng.choice(CLUBS)
+    country = rng.choice(COUNTRIES)
+    return CLUBS.index(club) + 50000, {
+        "teamCode": club[:3].upper(),
+        "translations": {
+            "displayName": {"EN": club, "ES": club},
+            "countryName": {"EN": country, "ES": country},
+        },
+    }
+
+
+def uefa_stats(rng, stats):
+    return [{"name": s, "value": rng.randrange(0, 1200)} for s in stats]
+
+
+def uefa_players(rng, params):
+    season = int(params.get("seasonYear", 2020))
+    offset, limit = int(params.get("offset", 0)), int(params.get("limit", 200))
+    stats = [s for s in params.get("stats", "").split(",") if s]
+    entries = []
+    for n in range(offset, min(offset + limit, UEFA_PLAYERS_PER_SEASON)):
+        team_id, team = uefa_team(rng)
+        entries.append({
+            "teamId": team_id,
+            "team": team,
+            "player": {
+                "id": season * 10000 + n,
+                "internationalName": _player_name(rng),
+                "age": str(rng.randrange(17, 38)),
+                "birthDate": f"{season - rng.randrange(17, 38)}-0{rng.randrange(1, 10)}-1{rng.randrange(10)}",
+                "countryCode": "ESP",
+                "countryOfBirthCode": "ESP",
+                "gender": "MALE",
+                "fieldPosition": rng.choice(["GOALKEEPER", "DEFENDER", "MIDFIELDER", "FORWARD"]),
+                "detailedFieldPosition": rng.choice(POSITIONS),
+                "clubId": str(team_id),
+                "clubShirtName": _player_name(rng).split()[-1].upper(),
+                "clubJerseyNumber": str(rng.randrange(1, 40)),
+            },
+            "statistics": uefa_stats(rng, stats),
+        })
+    return entries
+
+
+def uefa_teams(rng, params):
+    offset, limit = int(params.get("offset", 0)), int(params.get("limit", 200))
+    stats = [s for s in params.get("stats", "").split(",") if s]
+    entries = []
+    for _ in range(offset, min(offset + limit, UEFA_TEAMS_PER_SEASON)):
+        team_id, team = uefa_team(rng)
+        entries.append({"teamId": team_id, "team": team, "statistics": uefa_stats(rng, stats)})
+    return entries
+
+
+# ---------------------------------------------------------------------------
+# Enrutado por URL
+# ---------------------------------------------------------------------------
+
+HTML = "text/html; charset=utf-8"
+JSON = "application/json; charset=utf-8"
+
+_PAGE = re.compile(r"/page/(\d+)")
+
+
+def _page(url):
+    m = _PAGE.search(url)
+    return int(m.group(1)) if m else 1
+
+
+def synthesize(url: str, params=None):
+    """(content_type, cuerpo en bytes) para una URL de los scrapers, o None si no la conoce."""
+    params = params or {}
+    rng = rng_for(url, params)
+    if "transfermarkt" in url:
+        if "/fairnesstabelle/" in url:
+            body = tm_fairplay(rng)
+        elif "/scorerliste/" in url:
+            body = tm_scorerlist(rng, _page(url))
+        elif "/torschuetzenliste/" in url:
+            body = tm_goalscorers(rng, _page(url))
+        elif "/ewigeTabelle/" in url:
+            body = tm_alltime_table(rng)
+        elif "/alleEndspiele/" in url:
+            body = tm_finals(rng)
+        elif "/rekordspieler/" in url:
+            body = tm_record_players(rng)
+        elif "/ewigetorschuetzenliste/" in url:
+            body = tm_alltime_scorers(rng)
+        else:
+            return None
+        return HTML, body.encode("utf-8")
+    if "wikipedia.org/wiki/" in url:
+        return HTML, wiki_season(rng, url.rsplit("/", 1)[-1]).encode("utf-8")
+    if url.endswith("/v1/player-ranking"):
+        return JSON, json.dumps(uefa_players(rng, params)).encode("utf-8")
+    if url.endswith("/v1/team-ranking"):
+        return JSON, json.dumps(uefa_teams(rng, params)).encode("utf-8")
+    return None
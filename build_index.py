@@ -1,8 +1,17 @@
 # build_index.py
+import argparse
+import hashlib
 import json
+import math
+from array import array
 from tqdm import tqdm
 import faiss
-from sentence_transformers import SentenceTransformer
+from embeddings import MODEL_NAME, EmbeddingCache, get_encoder
+from filters import FilterIndexWriter
+from lexical import BM25Writer
+from shards import ShardWriter
+from record_store import RecordStoreWriter, write_id_index
+from utils import iter_jsonl, batched
 import numpy as np
 import os
 
@@ -10,48 +19,294 @@ IN_PATH = "generated_docs/documents.jsonl"
 INDEX_DIR = "index"
 os.makedirs(INDEX_DIR, exist_ok=True)
 
+INDEX_PATH = os.path.join(INDEX_DIR, "faiss.index")
+CONFIG_PATH = os.path.join(INDEX_DIR, "index_config.json")
+CACHE_PATH = os.path.join(INDEX_DIR, "embeddings_cache.sqlite")
+
 CHUNK_SIZE = 1000
 OVERLAP = 200
 
-def chunk_text(text):
-    chunks = []
+# Fragmentos por lote de embedding/inserción: acota la memoria de los
+# embeddings. BM25, los bitmaps de filtros y los shards sí crecen con el
+# corpus (postings, filas e índices enteros en memoria hasta el save)
+BATCH_SIZE = 256
+
+INDEX_TYPES = ["flat", "ivf", "ivfpq", "hnsw", "sq8"]
+
+def chunk_spans(text):
+    # (inicio, fin) de cada fragmento en caracteres del documento original
+    spans = []
     start = 0
     while start < len(text):
-        end = start + CHUNK_SIZE
-        chunks.append(text[start:end])
+        spans.append((start, min(start + CHUNK_SIZE, len(text))))
         start += CHUNK_SIZE - OVERLAP
-    return chunks
+    return spans
+
+def chunk_text(text):
+    return [text[start:end] for start, end in chunk_spans(text)]
+
+def chunk_id(doc_id, n, text):
+    # Id estable del fragmento en FAISS: cambia solo si cambia su contenido
+    h = hashlib.sha1(f"{doc_id}\0{n}\0{text}".encode("utf-8")).digest()
+    return int.from_bytes(h[:8], "little") & 0x7FFFFFFFFFFFFFFF
+
+def default_nlist(n):
+    # ~4·sqrt(n) listas, pero con al menos 39 vectores de entrenamiento por centroide
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+def factory_string(args, n):
+    if args.index_type == "flat":
+        return "Flat"
+    if args.index_type == "ivf":
+        return f"IVF{args.nlist or default_nlist(n)},Flat"
+    if args.index_type == "ivfpq":
+        # 2^nbits centroides por subcuantizador: no más de los que permite el corpus
+        nbits = min(args.pq_nbits, max(1, int(math.log2(max(2, n // 39)))))
+        return f"IVF{args.nlist or default_nlist(n)},PQ{args.pq_m}x{nbits}"
+    if args.index_type == "hnsw":
+        return f"HNSW{args.hnsw_m}"
+    if args.index_type == "sq8":
+        return "SQ8"
+    raise ValueError(f"Tipo de índice desconocido: {args.index_type}")
+
+def build_params(args):
+    # Parámetros que fijan la estructura del índice: si cambian, hay que reconstruir
+    return {
+        "index_type": args.index_type,
+        "nlist": args.nlist,
+        "pq_m": args.pq_m,
+        "pq_nbits": args.pq_nbits,
+        "hnsw_m": args.hnsw_m,
+        "ef_construction": args.ef_construction,
+    }
+
+def iter_chunks(path=IN_PATH):
+    # (doc, ordinal, inicio, fin) de cada fragmento, leyendo documents.jsonl en streaming
+    for doc in iter_jsonl(path):
+        for n, (start, end) in enumerate(chunk_spans(doc["text"])):
+            yield doc, n, start, end
+
+def scan_ids(path=IN_PATH):
+    # Primera pasada, sin embeddings: ids de todos los fragmentos en orden
+    ids = array("q")
+    for doc, n, start, end in iter_chunks(path):
+        ids.append(chunk_id(doc["doc_id"], n, doc["text"][start:end]))
+    return np.frombuffer(ids, dtype=np.int64)
+
+def iter_chunk_records(docs, metadata, filters, path=IN_PATH):
+    # Segunda pasada: escribe doc store + metadata + bitmaps de filtros y
+    # entrega (id, texto, documento) por fragmento
+    for doc in iter_jsonl(path):
+        doc_row = docs.append(doc)
+        for n, (start, end) in enumerate(chunk_spans(doc["text"])):
+            chunk = doc["text"][start:end]
+            cid = chunk_id(doc["doc_id"], n, chunk)
+            filters.add(cid, doc)
+            metadata.append({
+                "id": cid,
+                "doc_id": doc["doc_id"],
+                "doc": doc_row,
+                "chunk": n,
+                "start": start,
+                "end": end,
+                "text": chunk,
+            })
+            yield cid, chunk, doc
+
+def training_positions(n, size, seed=0):
+    # Posiciones al azar (semilla fija) repartidas por todo el corpus:
+    # documents.jsonl va agrupado por fuente y temporada, y los primeros
+    # `size` fragmentos sesgarían los centroides
+    if size >= n:
+        return set(range(n))
+    rng = np.random.default_rng(seed)
+    return set(rng.choice(n, size=size, replace=False).tolist())
+
+def new_faiss_index(n, args, cache):
+    factory = factory_string(args, n)
+
+    # Muestra de entrenamiento acotada (IVF/PQ/SQ), repartida por todo el
+    # corpus; los embeddings quedan en caché para la inserción. Flat/HNSW no
+    # se entrenan: la dimensión la da el modelo, sin recorrer el corpus
+    needs_training = args.index_type in ("ivf", "ivfpq", "sq8")
+    if needs_training:
+        wanted = training_positions(n, args.train_size)
+        sample = cache.encode([
+            doc["text"][start:end]
+            for pos, (doc, _, start, end) in enumerate(iter_chunks()) if pos in wanted
+        ])
+        dim = sample.shape[1]
+    else:
+        sample = None
+        dim = get_encoder(MODEL_NAME).get_sentence_embedding_dimension()
+
+    # FAISS debe devolver los ids estables de los fragmentos, no posiciones:
+    # los IVF guardan ids propios; el resto va envuelto en un IndexIDMap
+    if args.index_type in ("ivf", "ivfpq"):
+        index = faiss.index_factory(dim, factory)
+    else:
+        index = faiss.index_factory(dim, "IDMap," + factory)
+
+    if args.index_type == "hnsw":
+        base_index(index).hnsw.efConstruction = args.ef_construction
+
+    if not index.is_trained:
+        print(f"Entrenando índice {factory} con {len(sample)} vectores…")
+        index.train(sample)
+
+    return index, factory
+
+def base_index(index):
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+def load_previous_index(args):
+    # Índice del build anterior, si es compatible con los parámetros actuales
+    if not (os.path.exists(INDEX_PATH) and os.path.exists(CONFIG_PATH)):
+        return None
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if config.get("model") != MODEL_NAME or config.get("build") != build_params(args):
+        return None
+    ids_path = os.path.join(INDEX_DIR, "metadata.ids.npy")
+    if not os.path.exists(ids_path):
+        return None
+    index = faiss.read_index(INDEX_PATH)
+    # Ids del build anterior (se leen ya: el fichero se reescribe en este build)
+    old_ids = np.load(ids_path)
+    # Índice, ids y config tienen que ser del mismo build (uno cortado a medias no vale)
+    if index.ntotal != len(old_ids) or index.ntotal != config.get("n_vectors"):
+        return None
+    if config.get("build_id") != build_id(old_ids, config["factory"], args):
+        return None
+    return index, config["factory"], old_ids
+
+def build_id(ids, factory, args):
+    # Identifica el contenido del índice (ids de fragmento = hash de su texto):
+    # la caché de respuestas de query_rag se invalida cuando cambia
+    # (ordenados: no depende del orden de los documentos y cuadra con metadata.ids.npy)
+    h = hashlib.sha1(np.sort(np.asarray(ids, dtype=np.int64)).tobytes())
+    h.update(json.dumps([MODEL_NAME, factory, build_params(args)], sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Construye el índice FAISS del corpus")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    parser.add_argument("--nlist", type=int, default=None,
+                        help="Listas IVF (por defecto ~4·sqrt(n))")
+    parser.add_argument("--pq-m", type=int, default=48,
+                        help="Subcuantizadores PQ (debe dividir la dimensión)")
+    parser.add_argument("--pq-nbits", type=int, default=8)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, default=16,
+                        help="nprobe por defecto al consultar índices IVF")
+    parser.add_argument("--ef-search", type=int, default=64,
+                        help="efSearch por defecto al consultar índices HNSW")
+    parser.add_argument("--train-size", type=int, default=20000,
+                        help="Máximo de vectores para entrenar IVF/PQ/SQ")
+    parser.add_argument("--shards", action="store_true",
+                        help="Escribir también sub-índices por temporada y por fuente (shards/)")
+    parser.add_argument("--full", action="store_true",
+                        help="Reconstruye el índice desde cero (los embeddings siguen saliendo de la caché)")
+    return parser.parse_args()
 
 def main():
-    model = SentenceTransformer("all-MiniLM-L6-v2")
+    args = parse_args()
+    cache = EmbeddingCache(CACHE_PATH, MODEL_NAME)
+
+    # === PASADA 1: ids de los fragmentos ===
+    ids = scan_ids()
+
+    # === ÍNDICE: incremental si el anterior es compatible ===
+    previous = None if args.full else load_previous_index(args)
+    index, factory, old_ids = previous or (None, None, None)
+    if index is not None:
+        stale = np.setdiff1d(old_ids, ids)
+        if len(stale) and isinstance(base_index(index), faiss.IndexHNSW):
+            index = None  # HNSW no admite borrados: reconstrucción completa
+        elif len(stale):
+            index.remove_ids(faiss.IDSelectorBatch(stale))
+        if index is not None:
+            print(f"Actualización incremental: {len(stale)} fragmentos eliminados.")
 
-    texts = []
-    metadata = []
+    if index is None:
+        index, factory = new_faiss_index(len(ids), args, cache)
+        old_ids = np.zeros(0, dtype=np.int64)
 
-    # === LOAD DOCS ===
-    with open(IN_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            doc = json.loads(line)
-            for c in chunk_text(doc["text"]):
-                texts.append(c)
-                metadata.append(doc)
+    # Solo se añaden los fragmentos que el índice no tiene ya
+    new_mask = ~np.isin(ids, old_ids)
 
+    # === PASADA 2: docs -> fragmentos -> lotes -> embeddings -> índice ===
+    # Cada documento se guarda una sola vez en el doc store; la metadata del
+    # índice solo lleva el fragmento, su posición y su id estable en FAISS.
+    # El índice BM25 se rehace entero en la misma pasada (no necesita embeddings)
     print("Generando embeddings…")
-    vecs = model.encode(texts, batch_size=32, show_progress_bar=True)
-    vecs = np.array(vecs).astype("float32")
+    offset = 0
+    bm25 = BM25Writer()
+    filters = FilterIndexWriter()
+    # Los shards se rehacen enteros: necesitan el vector de todos los
+    # fragmentos (los ya indexados salen de la caché de embeddings)
+    shards = ShardWriter(index) if args.shards else None
+    with RecordStoreWriter(os.path.join(INDEX_DIR, "docs")) as docs, \
+         RecordStoreWriter(os.path.join(INDEX_DIR, "metadata")) as metadata:
+        batches = batched(iter_chunk_records(docs, metadata, filters), BATCH_SIZE)
+        for batch in tqdm(batches, total=math.ceil(len(ids) / BATCH_SIZE)):
+            for cid, text, _ in batch:
+                bm25.add(cid, text)
+            mask = new_mask[offset:offset + len(batch)]
+            offset += len(batch)
+            if shards is not None:
+                vecs = cache.encode([text for _, text, _ in batch])
+                batch_ids = np.array([cid for cid, _, _ in batch], dtype=np.int64)
+                shards.add([doc for _, _, doc in batch], batch_ids, vecs)
+                if mask.any():
+                    index.add_with_ids(vecs[mask], batch_ids[mask])
+            elif mask.any():
+                texts = [text for (_, text, _), new in zip(batch, mask) if new]
+                batch_ids = np.array([cid for (cid, _, _), new in zip(batch, mask) if new],
+                                     dtype=np.int64)
+                index.add_with_ids(cache.encode(texts), batch_ids)
 
-    index = faiss.IndexFlatL2(vecs.shape[1])
-    index.add(vecs)
+    lexical_stats = bm25.save(INDEX_DIR)
+    filter_stats = filters.save(INDEX_DIR)
+    shard_stats = shards.save(INDEX_DIR) if shards is not None else None
 
-    faiss.write_index(index, os.path.join(INDEX_DIR, "faiss.index"))
+    print(f"Embeddings: {cache.hits} desde caché, {cache.misses} calculados; "
+          f"{int(new_mask.sum())} fragmentos añadidos al índice.")
+    cache.close()
 
-    # metadata
-    with open(os.path.join(INDEX_DIR, "metadata.jsonl"), "w", encoding="utf-8") as f:
-        for m in metadata:
-            f.write(json.dumps(m, ensure_ascii=False) + "\n")
+    config = {
+        "index_type": args.index_type,
+        "factory": factory,
+        "model": MODEL_NAME,
+        "build_id": build_id(ids, factory, args),
+        "dim": int(index.d),
+        "n_vectors": int(index.ntotal),
+        "build": build_params(args),
+        # Valores por defecto de búsqueda; query_rag permite cambiarlos por consulta
+        "search": {"nprobe": args.nprobe, "efSearch": args.ef_search},
+        # Índice BM25 (bm25.npz) para la recuperación híbrida
+        "lexical": lexical_stats,
+        # Bitmaps por campo (filters.npz) para las búsquedas con filtro
+        "filters": filter_stats,
+        # Sub-índices por temporada/fuente (shards/manifest.json), si se pidieron
+        "shards": shard_stats,
+    }
 
-    print("Índice creado correctamente.")
+    # Índice, ids y config, en ese orden y cada uno con fichero temporal +
+    # os.replace. La config va la última y su build_id/n_vectors tienen que
+    # cuadrar con el índice y los ids: si el build se corta entre medias, el
+    # siguiente no se fía de ellos y reconstruye (ver load_previous_index)
+    faiss.write_index(index, INDEX_PATH + ".tmp")
+    os.replace(INDEX_PATH + ".tmp", INDEX_PATH)
+    write_id_index(os.path.join(INDEX_DIR, "metadata"), ids)
+    with open(CONFIG_PATH + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    os.replace(CONFIG_PATH + ".tmp", CONFIG_PATH)
 
+    print(f"Índice {factory} creado correctamente.")
 
 if __name__ == "__main__":
     main()
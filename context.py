@@ -0,0 +1,110 @@
+# context.py
+import sys
+from functools import lru_cache
+
+# Contexto del prompt con presupuesto de tokens.
+#
+# Los fragmentos recuperados llegan de mejor a peor. Se van metiendo en ese
+# orden mientras quepan en el presupuesto; los de un mismo documento que se
+# solapan (los fragmentos comparten OVERLAP caracteres) o que son contiguos
+# se funden en un solo trozo del documento, así el solape no se paga dos
+# veces y el LLM lee el texto seguido. Un fragmento que ya está dentro de
+# otro elegido no cuenta.
+
+CONTEXT_TOKENS = 2000
+FALLBACK_ENCODING = "o200k_base"
+CHARS_PER_TOKEN = 4       # estimación si tiktoken no está disponible
+SEPARATOR = "\n\n"         # entre trozos del contexto
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model):
+    # tiktoken descarga la tabla BPE la primera vez: sin red ni caché se estima
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(FALLBACK_ENCODING)
+    except Exception as e:
+        # A stderr: con --batch --out - la salida estándar es el JSONL
+        print(f"⚠️  tiktoken no disponible ({type(e).__name__}): tokens estimados "
+              f"a {CHARS_PER_TOKEN} caracteres por token", file=sys.stderr)
+        return None
+
+def count_tokens(text, model):
+    tokenizer = get_tokenizer(model)
+    if tokenizer is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text))
+
+def truncate_tokens(text, max_tokens, model):
+    tokenizer = get_tokenizer(model)
+    if tokenizer is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return tokenizer.decode(tokenizer.encode(text)[:max_tokens])
+
+
+def build_context(retrieved, model, budget=CONTEXT_TOKENS, get_doc=None):
+    """
+    (texto del contexto, estadísticas) a partir de [(metadata, score)] en
+    orden de relevancia. Con `get_doc` (Retriever.get_doc) los fragmentos de
+    un mismo documento se funden; sin él, cada fragmento va por separado.
+    """
+    pieces = []          # [doc, inicio, fin, texto, tokens, rango del mejor fragmento]
+    used = 0
+    stats = {"chunks": len(retrieved), "packed": 0, "merged": 0, "duplicates": 0, "dropped": 0}
+    doc_texts = {}
+    # Los separadores también ocupan presupuesto: uno entre cada dos trozos
+    sep_tokens = count_tokens(SEPARATOR, model)
+
+    def separators(n_pieces):
+        return sep_tokens * max(n_pieces - 1, 0)
+
+    for rank, (meta, _) in enumerate(retrieved):
+        doc, start, end = meta.get("doc"), meta.get("start"), meta.get("end")
+        mergeable = get_doc is not None and None not in (doc, start, end)
+        if mergeable and doc not in doc_texts:
+            doc_texts[doc] = get_doc(doc)["text"]
+
+        # Trozos ya elegidos del mismo documento que se tocan con este
+        touching = [p for p in pieces if mergeable and p[0] == doc and p[1] <= end and start <= p[2]]
+        if any(p[1] <= start and end <= p[2] for p in touching):
+            stats["duplicates"] += 1
+            continue
+        if touching:
+            start = min([start] + [p[1] for p in touching])
+            end = max([end] + [p[2] for p in touching])
+            text = doc_texts[doc][start:end]
+        else:
+            text = meta["text"]
+
+        tokens = count_tokens(text, model)
+        cost = (tokens - sum(p[4] for p in touching)
+                + separators(len(pieces) - len(touching) + 1) - separators(len(pieces)))
+        if used + cost > budget:
+            if pieces:
+                # Otro más corto, más abajo, puede caber todavía
+                stats["dropped"] += 1
+                continue
+            # Aunque el mejor fragmento no quepa entero, algo de contexto tiene que ir
+            text = truncate_tokens(text, budget, model)
+            tokens = cost = count_tokens(text, model)
+
+        for p in touching:
+            pieces.remove(p)
+        stats["merged"] += len(touching)
+        best_rank = min([rank] + [p[5] for p in touching])
+        pieces.append([doc if mergeable else None, start, end, text, tokens, best_rank])
+        used += cost
+        stats["packed"] += 1
+
+    # Documentos por su mejor fragmento; dentro de cada uno, en orden de lectura
+    doc_rank = {}
+    for p in pieces:
+        key = p[0] if p[0] is not None else ("fragmento", p[5])
+        doc_rank[key] = min(doc_rank.get(key, p[5]), p[5])
+    pieces.sort(key=lambda p: (doc_rank[p[0] if p[0] is not None else ("fragmento", p[5])], p[1] or 0))
+
+    stats["tokens"] = used
+    return SEPARATOR.join(p[3] for p in pieces), stats
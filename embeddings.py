@@ -0,0 +1,80 @@
+# embeddings.py
+from functools import lru_cache
+import hashlib
+import sqlite3
+import numpy as np
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model_name=MODEL_NAME):
+    # Un único modelo por proceso: cargarlo cuesta segundos y cientos de MB
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    model.encode(["warmup"])  # primera pasada para dejarlo caliente
+    return model
+
+
+def encode(texts, model_name=MODEL_NAME, batch_size=32, show_progress_bar=False):
+    vecs = get_encoder(model_name).encode(
+        texts, batch_size=batch_size, show_progress_bar=show_progress_bar
+    )
+    return np.asarray(vecs, dtype="float32")
+
+
+class EmbeddingCache:
+    # Caché persistente (SQLite) de embeddings por hash(modelo, texto):
+    # solo se codifican los fragmentos nuevos o modificados
+    def __init__(self, path, model_name=MODEL_NAME):
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB NOT NULL)"
+        )
+
+    def key(self, text):
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _get_many(self, keys):
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            marks = ",".join("?" * len(batch))
+            for key, vec in self.conn.execute(
+                f"SELECT key, vec FROM embeddings WHERE key IN ({marks})", batch
+            ):
+                found[key] = np.frombuffer(vec, dtype="float32")
+        return found
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        keys = [self.key(t) for t in texts]
+        found = self._get_many(keys)
+
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            vecs = encode(list(missing.values()), model_name=self.model_name,
+                          batch_size=batch_size, show_progress_bar=show_progress_bar)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+                [(key, vec.tobytes()) for key, vec in zip(missing, vecs)],
+            )
+            self.conn.commit()
+            found.update(zip(missing, vecs))
+
+        if not keys:
+            return np.zeros((0, 0), dtype="float32")
+        return np.stack([found[k] for k in keys]).astype("float32", copy=False)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,111 @@
+# filters.py
+import json
+import os
+from array import array
+import numpy as np
+from utils import fold_text, normalize_team
+
+# Filtros estructurados sobre los fragmentos del índice.
+#
+# ingest.py añade a cada documento sus campos tipados (season_year, teams,
+# stage, source_family y el type de siempre). En el build, cada valor de
+# cada campo se guarda como un bitmap sobre las filas de la metadata:
+#   filters.npz   bitmaps (uno por campo=valor, empaquetados con packbits)
+#                 + id estable de cada fila
+#   filters.json  lista de (campo, valor) en el orden de los bitmaps
+# Un filtro es {campo: valor o lista de valores}: OR dentro de un campo,
+# AND entre campos. El resultado son los ids que se pasan a FAISS/BM25.
+
+FILTER_FIELDS = ["season_year", "teams", "stage", "source_family", "type"]
+
+def filter_paths(index_dir):
+    return os.path.join(index_dir, "filters.npz"), os.path.join(index_dir, "filters.json")
+
+def normalize_value(field, value):
+    # Misma forma en el build y en la consulta: "AC Milan" y "Milan" -> "milan",
+    # "Real Madrid CF" y "Real Madrid" -> "real madrid"
+    if field == "season_year":
+        return int(value)
+    if field == "teams":
+        return normalize_team(value)
+    return fold_text(value).strip()
+
+def field_values(doc, field):
+    value = doc.get(field)
+    if value is None or value == "":
+        return []
+    values = value if isinstance(value, list) else [value]
+    return [normalize_value(field, v) for v in values if v is not None and v != ""]
+
+
+class FilterIndexWriter:
+    # Una llamada a add() por fragmento, en el orden de la metadata
+    def __init__(self):
+        self._rows = {}          # (campo, valor) -> filas
+        self._ids = array("q")
+
+    def add(self, chunk_id, doc):
+        row = len(self._ids)
+        for field in FILTER_FIELDS:
+            for value in field_values(doc, field):
+                self._rows.setdefault((field, value), array("i")).append(row)
+        self._ids.append(chunk_id)
+
+    def save(self, index_dir):
+        npz_path, json_path = filter_paths(index_dir)
+        n = len(self._ids)
+        keys = sorted(self._rows, key=lambda kv: (kv[0], str(kv[1])))
+        bitmaps = np.zeros((len(keys), (n + 7) // 8), dtype=np.uint8)
+        for j, key in enumerate(keys):
+            mask = np.zeros(n, dtype=bool)
+            mask[np.frombuffer(self._rows[key], dtype=np.int32)] = True
+            bitmaps[j] = np.packbits(mask)
+        np.savez(npz_path, bitmaps=bitmaps, ids=np.frombuffer(self._ids, dtype=np.int64))
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"n_rows": n, "keys": [list(k) for k in keys]}, f, ensure_ascii=False)
+
+        counts = {}
+        for field, _ in keys:
+            counts[field] = counts.get(field, 0) + 1
+        return {"n_rows": n, "values_per_field": counts}
+
+
+class FilterIndex:
+    def __init__(self, index_dir):
+        npz_path, json_path = filter_paths(index_dir)
+        with open(json_path, "r", encoding="utf-8") as f:
+            info = json.load(f)
+        data = np.load(npz_path)
+        self.bitmaps = data["bitmaps"]
+        self.ids = data["ids"]
+        self.n_rows = info["n_rows"]
+        self.keys = {(field, value): j for j, (field, value) in enumerate(info["keys"])}
+
+    @staticmethod
+    def exists(index_dir):
+        return all(os.path.exists(p) for p in filter_paths(index_dir))
+
+    def values(self, field):
+        return sorted(v for f, v in self.keys if f == field)
+
+    def mask(self, filters):
+        """Máscara booleana de filas que cumplen el filtro (None si no hay filtro)."""
+        packed = None
+        for field, wanted in (filters or {}).items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Campo de filtro desconocido: {field} (válidos: {', '.join(FILTER_FIELDS)})")
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            field_bits = np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+            for value in wanted:
+                j = self.keys.get((field, normalize_value(field, value)))
+                if j is not None:
+                    field_bits |= self.bitmaps[j]
+            packed = field_bits if packed is None else packed & field_bits
+        if packed is None:
+            return None
+        return np.unpackbits(packed, count=self.n_rows).astype(bool)
+
+    def select_ids(self, filters):
+        """Ids estables de los fragmentos que cumplen el filtro (None si no hay filtro)."""
+        mask = self.mask(filters)
+        return None if mask is None else self.ids[mask]
@@ -1,5 +1,11 @@
 # ingest.py
+import argparse
 import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
 from utils import list_csv, read_csv_safe, save_jsonl
 from tqdm import tqdm
 import glob
@@ -10,45 +16,115 @@ OUT_DIR = "generated_docs"
 
 os.makedirs(OUT_DIR, exist_ok=True)
 
+def text_column(df, col):
+    # Igual que formatear cada celda con f"{valor}" (NaN -> "nan", columna ausente -> "")
+    if col not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    s = df[col]
+    return s.astype(object).where(s.notna(), "nan").astype(str)
+
+# Columnas de las filas de partido y sus nombres en cada familia de CSV
+# (champions_*.csv usa HomeTeam; ucl_matches_wikipedia_final.csv, Home_team)
+MATCH_COLUMNS = {
+    "HomeTeam": ["HomeTeam", "Home_team"],
+    "AwayTeam": ["AwayTeam", "Away_team"],
+    "Score": ["Score"],
+    "Date": ["Date"],
+    "Stage": ["Stage"],
+    "season_year": ["Season_year"],
+}
+
+def match_columns(df):
+    # Nombre canónico -> columna real del fichero (solo las que existen)
+    found = {}
+    for name, aliases in MATCH_COLUMNS.items():
+        for col in aliases:
+            if col in df.columns:
+                found[name] = col
+                break
+    return found
+
+# Temporada en el nombre de los ficheros por temporada: champions_1994_95.csv
+SEASON_FILE = re.compile(r"_(\d{4})_\d{2}\.csv$")
+
+def source_family(path):
+    # partidos / uefa / transfermarkt (subcarpeta de data/) o docs
+    parts = re.split(r"[\\/]", os.path.normpath(path))
+    if parts[0] == DATA_DIR and len(parts) > 2:
+        return parts[1]
+    return "docs" if parts[0] == DOCS_DIR else parts[0]
+
+def file_fields(path):
+    # Campos tipados comunes a todos los documentos de un fichero (ver filters.py)
+    m = SEASON_FILE.search(os.path.basename(path))
+    return {
+        "season_year": int(m.group(1)) if m else None,
+        "source_family": source_family(path),
+    }
+
+def optional_values(df, col):
+    # Valores de la columna con None en lugar de NaN (columna ausente -> todo None)
+    if col not in df.columns:
+        return [None] * len(df)
+    return df[col].astype(object).where(df[col].notna(), None).tolist()
+
 def ingest_csv(path):
+    # Un solo parseo por fichero: la muestra de schema/resumen sale del mismo DataFrame
     df = read_csv_safe(path)
+    head = df.head(10)
     filename = os.path.basename(path)
-
-    docs = []
+    fields = file_fields(path)
 
     # === DOCUMENTO 1: SCHEMA ===
-    schema = f"# Schema del archivo {filename}\nColumnas:\n- " + "\n- ".join(df.columns)
-    docs.append({
+    schema = f"# Schema del archivo {filename}\nColumnas:\n- " + "\n- ".join(head.columns)
+    yield {
         "doc_id": f"{filename}_schema",
         "source": path,
         "type": "schema",
-        "text": schema
-    })
+        "text": schema,
+        **fields,
+    }
 
     # === DOCUMENTO 2: RESUMEN GENERAL ===
-    preview = df.head(10).fillna("").astype(str)
+    preview = head.fillna("").astype(str)
     preview_text = "\n".join([" | ".join(row) for row in preview.values])
 
     summary = f"# Resumen del archivo {filename}\nFilas: {len(df)}\nMuestra de datos:\n{preview_text}"
-    docs.append({
+    yield {
         "doc_id": f"{filename}_summary",
         "source": path,
         "type": "summary",
-        "text": summary
-    })
+        "text": summary,
+        **fields,
+    }
 
     # === DOCUMENTO 3: FILAS (solo si es archivo de partidos) ===
-    if {"HomeTeam", "AwayTeam", "Score"} & set(df.columns):
-        for i, row in df.iterrows():
-            t = f"Partido | Local: {row.get('HomeTeam','')} | Visitante: {row.get('AwayTeam','')} | Score: {row.get('Score','')} | Fecha: {row.get('Date','')} | Temporada Archivo: {filename}"
-            docs.append({
+    cols = match_columns(df)
+    if {"HomeTeam", "AwayTeam", "Score"} & set(cols):
+        # Texto de todas las filas con operaciones por columna, sin iterrows
+        texts = (
+            "Partido | Local: " + text_column(df, cols.get("HomeTeam"))
+            + " | Visitante: " + text_column(df, cols.get("AwayTeam"))
+            + " | Score: " + text_column(df, cols.get("Score"))
+            + " | Fecha: " + text_column(df, cols.get("Date"))
+            + f" | Temporada Archivo: {filename}"
+        )
+        # Ficheros con varias temporadas traen la suya en cada fila
+        seasons = optional_values(df, cols.get("season_year"))
+        rows = zip(df.index, texts.tolist(), optional_values(df, cols.get("HomeTeam")),
+                   optional_values(df, cols.get("AwayTeam")), optional_values(df, cols.get("Stage")),
+                   seasons)
+        for i, t, home, away, stage, season in rows:
+            yield {
                 "doc_id": f"{filename}_row_{i}",
                 "source": path,
                 "type": "match_row",
-                "text": t
-            })
-
-    return docs
+                "text": t,
+                **fields,
+                "season_year": int(season) if season is not None else fields["season_year"],
+                "teams": [team for team in (home, away) if team is not None],
+                "stage": stage,
+            }
 
 
 def ingest_md(path):
@@ -61,24 +137,88 @@ def ingest_md(path):
         "doc_id": filename,
         "source": path,
         "type": "markdown",
-        "text": text
+        "text": text,
+        **file_fields(path),
     }]
 
 
-def main():
-    all_docs = []
+def list_sources():
+    # Orden fijo de ficheros: define el orden de documents.jsonl
+    paths = []
 
     # === CSV ===
     for root, dirs, files in os.walk(DATA_DIR):
-        for f in list_csv(root):
-            all_docs.extend(ingest_csv(f))
+        # os.walk recorre en el orden del sistema de ficheros: se fija aquí
+        dirs.sort()
+        paths.extend(list_csv(root))
 
     # === MARKDOWN ===
-    for md in glob.glob(os.path.join(DOCS_DIR, "*.md")):
-        all_docs.extend(ingest_md(md))
+    paths.extend(sorted(glob.glob(os.path.join(DOCS_DIR, "*.md"))))
+    return paths
+
+
+def ingest_file(path):
+    # Unidad de trabajo de cada proceso: documentos de un fichero + tiempo empleado
+    t0 = time.perf_counter()
+    docs = list(ingest_csv(path)) if path.endswith(".csv") else ingest_md(path)
+    return path, docs, time.perf_counter() - t0
+
+
+def imap_ordered(pool, fn, items, window):
+    # Como pool.map, pero con como mucho `window` ficheros en vuelo:
+    # resultados en el orden de entrada y memoria acotada
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
 
-    save_jsonl(os.path.join(OUT_DIR, "documents.jsonl"), all_docs)
-    print(f"Generados {len(all_docs)} documentos.")
+
+def iter_docs(workers=1, report=None):
+    paths = list_sources()
+
+    if workers <= 1:
+        results = map(ingest_file, paths)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = imap_ordered(pool, ingest_file, paths, window=2 * workers)
+
+    try:
+        for n, (path, docs, elapsed) in enumerate(results, 1):
+            if report is not None:
+                report.append((path, len(docs), elapsed))
+            print(f"  [{n}/{len(paths)}] {elapsed:6.2f}s {len(docs):6d} docs  {path}")
+            yield from docs
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Genera documents.jsonl a partir de data/ y docs/")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Procesos para leer los ficheros en paralelo (1 = en serie)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = []
+    t0 = time.perf_counter()
+
+    # Se escriben en streaming y en el orden de list_sources(), sea cual sea
+    # el nº de procesos: la salida es idéntica a la de una ejecución en serie
+    n_docs = save_jsonl(os.path.join(OUT_DIR, "documents.jsonl"),
+                        iter_docs(args.workers, report))
+
+    print("\n⏱️ Ficheros más lentos:")
+    for path, n, elapsed in sorted(report, key=lambda r: r[2], reverse=True)[:5]:
+        print(f"  {elapsed:6.2f}s {n:6d} docs  {path}")
+    print(f"Generados {n_docs} documentos en {time.perf_counter() - t0:.2f}s "
+          f"({len(report)} ficheros, {args.workers} procesos).")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+# lexical.py
+import json
+import os
+import re
+from array import array
+from collections import Counter
+import numpy as np
+from utils import fold_text
+
+# Índice invertido BM25 sobre los mismos fragmentos que el índice FAISS.
+# Los embeddings de MiniLM no distinguen bien nombres propios y marcadores
+# ("Shelbourne 1–2 Tavriya"); BM25 sí, así que query_rag fusiona ambos.
+#
+# Ficheros (junto a faiss.index):
+#   bm25.npz         vocabulario ordenado + postings en CSR (filas y tf por término),
+#                    longitud de cada fragmento e id estable de cada fila
+#   bm25.json        parámetros (k1, b) y estadísticas del corpus
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Marcadores y temporadas ("1-2", "2:0", "1992-93") como token propio,
+# además de cada número por separado
+_TOKEN = re.compile(r"\d+[-:]\d+|[a-z0-9]+")
+_PARTS = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    tokens = []
+    for tok in _TOKEN.findall(fold_text(text)):
+        tokens.append(tok)
+        if not tok.isalnum():
+            tokens.extend(_PARTS.findall(tok))
+    return tokens
+
+def bm25_paths(index_dir):
+    return os.path.join(index_dir, "bm25.npz"), os.path.join(index_dir, "bm25.json")
+
+
+class BM25Writer:
+    # Se alimenta fragmento a fragmento (en el orden de la metadata) durante el build
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1, self.b = k1, b
+        self._postings = {}          # término -> (filas, tfs)
+        self._doc_len = array("i")
+        self._ids = array("q")
+
+    def add(self, chunk_id, text):
+        row = len(self._doc_len)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            rows, tfs = self._postings.get(term) or self._postings.setdefault(term, (array("i"), array("i")))
+            rows.append(row)
+            tfs.append(tf)
+        self._doc_len.append(sum(counts.values()))
+        self._ids.append(chunk_id)
+
+    def save(self, index_dir):
+        npz_path, json_path = bm25_paths(index_dir)
+        terms = sorted(self._postings)
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        for n, term in enumerate(terms):
+            indptr[n + 1] = indptr[n] + len(self._postings[term][0])
+        rows = np.empty(indptr[-1], dtype=np.int32)
+        tfs = np.empty(indptr[-1], dtype=np.float32)
+        for n, term in enumerate(terms):
+            r, t = self._postings[term]
+            rows[indptr[n]:indptr[n + 1]] = np.frombuffer(r, dtype=np.int32)
+            tfs[indptr[n]:indptr[n + 1]] = np.frombuffer(t, dtype=np.int32)
+
+        doc_len = np.frombuffer(self._doc_len, dtype=np.int32)
+        np.savez(
+            npz_path,
+            terms=np.array(terms, dtype=str),
+            indptr=indptr,
+            rows=rows,
+            tfs=tfs,
+            doc_len=doc_len,
+            ids=np.frombuffer(self._ids, dtype=np.int64),
+        )
+        stats = {
+            "k1": self.k1,
+            "b": self.b,
+            "n_docs": int(len(doc_len)),
+            "n_terms": len(terms),
+            "avgdl": float(doc_len.mean()) if len(doc_len) else 0.0,
+        }
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+        return stats
+
+
+class BM25Index:
+    def __init__(self, index_dir):
+        npz_path, json_path = bm25_paths(index_dir)
+        with open(json_path, "r", encoding="utf-8") as f:
+            self.stats = json.load(f)
+        data = np.load(npz_path)
+        self.terms = data["terms"]
+        self.indptr = data["indptr"]
+        self.rows = data["rows"]
+        self.tfs = data["tfs"]
+        self.ids = data["ids"]
+
+        k1, b = self.stats["k1"], self.stats["b"]
+        n = self.stats["n_docs"]
+        avgdl = self.stats["avgdl"] or 1.0
+        # Parte del denominador que solo depende del fragmento: se calcula una vez
+        self._norm = (k1 * (1 - b + b * data["doc_len"] / avgdl)).astype(np.float32)
+        df = np.diff(self.indptr)
+        self._idf = np.log(1 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        self._k1 = k1
+
+    @staticmethod
+    def exists(index_dir):
+        return all(os.path.exists(p) for p in bm25_paths(index_dir))
+
+    def term_ids(self, tokens):
+        tokens = np.array(sorted(set(tokens)), dtype=str)
+        if not len(tokens) or not len(self.terms):
+            return np.zeros(0, dtype=np.int64)
+        pos = np.searchsorted(self.terms, tokens)
+        pos = np.minimum(pos, len(self.terms) - 1)
+        return pos[self.terms[pos] == tokens]
+
+    def search(self, query, k=10, allowed=None):
+        """
+        (ids, puntuaciones) de los k mejores fragmentos para la consulta, de
+        mayor a menor. `allowed` (máscara booleana por fila) limita los candidatos.
+        """
+        rows, scores = [], []
+        for t in self.term_ids(tokenize(query)):
+            lo, hi = self.indptr[t], self.indptr[t + 1]
+            r = self.rows[lo:hi]
+            tf = self.tfs[lo:hi]
+            if allowed is not None:
+                keep = allowed[r]
+                r, tf = r[keep], tf[keep]
+            rows.append(r)
+            scores.append(self._idf[t] * tf * (self._k1 + 1) / (tf + self._norm[r]))
+        if not rows or not sum(len(r) for r in rows):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        # Suma por fragmento solo sobre los que tienen algún término (sin vector denso de N)
+        rows, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+        if len(totals) > k:
+            top = np.argpartition(-totals, k - 1)[:k]
+        else:
+            top = np.arange(len(totals))
+        top = top[np.argsort(-totals[top], kind="stable")]
+        return self.ids[rows[top]], totals[top].astype(np.float32)
+
+
+def rrf_fuse(rankings, k=5, weights=None, k0=60):
+    """
+    Reciprocal Rank Fusion: cada lista de ids (de mejor a peor) aporta
+    peso / (k0 + posición). No hace falta que las puntuaciones de FAISS
+    (distancias) y de BM25 estén en la misma escala.
+    Devuelve [(id, puntuación fusionada)] de mayor a menor.
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused = {}
+    for ranking, w in zip(rankings, weights):
+        for rank, i in enumerate(ranking):
+            i = int(i)
+            fused[i] = fused.get(i, 0.0) + w / (k0 + rank + 1)
+    return sorted(fused.items(), key=lambda kv: -kv[1])[:k]
@@ -0,0 +1,350 @@
+# pipeline.py
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Orquestador de todo el flujo: scrapers de src/ -> ingest.py -> build_index.py.
+# Cada etapa declara sus dependencias y sus salidas; las etapas independientes
+# se lanzan en paralelo (como mucho una por host, para no saltarse el
+# limitador de peticiones de cada scraper) y las que no tienen entradas
+# nuevas (mismo hash de contenido que en la última ejecución) se saltan.
+
+STATE_PATH = "pipeline_state.json"
+INDEX_CONFIG_PATH = os.path.join("index", "index_config.json")
+LOG_DIR = os.path.join("logs", "pipeline")
+
+TM = "www.transfermarkt.es"
+UEFA = "compstats.uefa.com"
+WIKI = "en.wikipedia.org"
+
+# nombre -> script, host al que ataca, si admite selección de temporadas, salidas
+SCRAPERS = {
+    "scrapeodeportividad": {
+        "host": TM, "seasons": True,
+        "outputs": ["data/transfermarkt/tfmkt_cl_fairplay_1992_2025.csv"],
+    },
+    "scrapeogolmasasistencia": {
+        "host": TM, "seasons": True,
+        "outputs": ["data/transfermarkt/tfmkt_cl_goals_assists_1992_2025.csv"],
+    },
+    "scrapeotodoslosgoleadores": {
+        "host": TM, "seasons": True,
+        "outputs": ["data/transfermarkt/tfmkt_cl_goalscorers_1992_2025.csv"],
+    },
+    "scrapeotransferclasificacionhistorica": {
+        "host": TM, "seasons": False,
+        "outputs": ["data/transfermarkt/tfmkt_alltime_club_table.csv"],
+    },
+    "scrapeotransferfinales": {
+        "host": TM, "seasons": False,
+        "outputs": ["data/transfermarkt/tfmkt_champions_finals_alltime.csv"],
+    },
+    "scrapeotransfergolporpartido": {
+        "host": TM, "seasons": False,
+        "outputs": ["data/transfermarkt/tfmkt_goals_per_match_alltime.csv"],
+    },
+    "scrapeotransfermaxpartidos": {
+        "host": TM, "seasons": False,
+        "outputs": ["data/transfermarkt/tfmkt_most_appearances_alltime.csv"],
+    },
+    "scrapeotransfertopscorers": {
+        "host": TM, "seasons": False,
+        "outputs": ["data/transfermarkt/tfmkt_topscorers_alltime.csv"],
+    },
+    "scrapeowikipedia": {
+        "host": WIKI, "seasons": True,
+        "outputs": ["data/uefa/ucl_matches_wikipedia_final.csv"],
+    },
+    "scraperclub": {
+        "host": UEFA, "seasons": True,
+        "outputs": ["data/uefa/ucl_clubs_*_stats_1992_2025.csv"],
+    },
+    "scraperjugador": {
+        "host": UEFA, "seasons": True,
+        "outputs": ["data/uefa/ucl_players_*_stats_1992_2025.csv"],
+    },
+}
+
+
+def ingest_inputs():
+    # Los mismos ficheros que procesa ingest.py, en el mismo orden
+    from ingest import list_sources
+    return list_sources()
+
+
+# Clave de "build" en index_config.json -> opción de build_index.py
+BUILD_FLAGS = {
+    "index_type": "--index-type",
+    "nlist": "--nlist",
+    "pq_m": "--pq-m",
+    "pq_nbits": "--pq-nbits",
+    "hnsw_m": "--hnsw-m",
+    "ef_construction": "--ef-construction",
+}
+
+
+def previous_build_args():
+    """
+    Opciones de build_index.py con las que se construyó el índice actual
+    (index/index_config.json): sin --build-args, la pipeline lo reconstruye
+    igual (mismo tipo, mismos parámetros, con o sin shards), no como Flat.
+    """
+    try:
+        with open(INDEX_CONFIG_PATH, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return []
+    build_args = []
+    for key, flag in BUILD_FLAGS.items():
+        value = (config.get("build") or {}).get(key)
+        if value is not None:
+            build_args += [flag, str(value)]
+    search = config.get("search") or {}
+    if search.get("nprobe") is not None:
+        build_args += ["--nprobe", str(search["nprobe"])]
+    if search.get("efSearch") is not None:
+        build_args += ["--ef-search", str(search["efSearch"])]
+    if config.get("shards"):
+        build_args.append("--shards")
+    return build_args
+
+
+def stages(args):
+    """Grafo de etapas: nombre -> {cmd, deps, inputs, outputs, host}."""
+    graph = {}
+    for name, spec in SCRAPERS.items():
+        cmd = [sys.executable, os.path.join("src", f"{name}.py")]
+        if args.offline:
+            cmd.append("--offline")
+        if args.since_last_run and spec["seasons"]:
+            cmd.append("--since-last-run")
+        graph[name] = {
+            "cmd": cmd,
+            "deps": [],
+            "inputs": None,      # fuente externa: siempre se ejecuta
+            "outputs": spec["outputs"],
+            "host": spec["host"],
+        }
+
+    graph["ingest"] = {
+        "cmd": [sys.executable, "ingest.py"],
+        "deps": list(SCRAPERS),
+        "inputs": ingest_inputs,
+        "outputs": ["generated_docs/documents.jsonl"],
+        "host": None,
+    }
+    build_args = shlex.split(args.build_args) if args.build_args is not None else previous_build_args()
+    graph["build_index"] = {
+        "cmd": [sys.executable, "build_index.py"] + build_args,
+        "deps": ["ingest"],
+        "inputs": lambda: ["generated_docs/documents.jsonl"],
+        "outputs": ["index/faiss.index", "index/index_config.json"],
+        "host": None,
+    }
+    return graph
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def inputs_hash(paths, options=()):
+    # Hash del conjunto de entradas: rutas + contenido de cada fichero, más
+    # las opciones de la etapa (otro tipo de índice también es "entrada nueva")
+    h = hashlib.sha1()
+    h.update("\0".join(options).encode("utf-8") + b"\0")
+    for path in paths:
+        h.update(path.replace(os.sep, "/").encode("utf-8") + b"\0")
+        h.update(file_sha1(path).encode("ascii") if os.path.exists(path) else b"-")
+    return h.hexdigest()
+
+
+def outputs_exist(patterns):
+    return all(glob.glob(p) for p in patterns)
+
+
+def load_state():
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    with open(STATE_PATH, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+def selected_stages(graph, only):
+    """Etapas pedidas y todo lo que depende de ellas (aguas abajo)."""
+    if not only:
+        return set(graph)
+    unknown = set(only) - set(graph)
+    if unknown:
+        raise SystemExit(f"Etapas desconocidas: {', '.join(sorted(unknown))}")
+    selected = set(only)
+    changed = True
+    while changed:
+        changed = False
+        for name, stage in graph.items():
+            if name not in selected and selected.intersection(stage["deps"]):
+                selected.add(name)
+                changed = True
+    return selected
+
+
+def run_stage(name, stage):
+    # Salida de cada etapa a su propio log: en paralelo no se mezcla en pantalla
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f"{name}.log")
+    t0 = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.run(stage["cmd"], stdout=log, stderr=subprocess.STDOUT,
+                              env={**os.environ, "PYTHONIOENCODING": "utf-8"})
+    return proc.returncode, time.perf_counter() - t0, log_path
+
+
+def run_pipeline(graph, selected, jobs=4, force=False, dry_run=False):
+    state = load_state()
+    report = {}   # nombre -> (estado, segundos, detalle)
+    pending = {name for name in graph if name in selected}
+    running = {}  # future -> (nombre, hash de entradas)
+    busy_hosts = set()
+
+    def deps_done(name):
+        return all(d not in pending and d not in {n for n, _ in running.values()}
+                   for d in graph[name]["deps"])
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            # Lanzar todo lo que esté listo (respetando 1 etapa por host)
+            for name in sorted(pending):
+                stage = graph[name]
+                if not deps_done(name) or len(running) >= jobs:
+                    continue
+                if stage["host"] and stage["host"] in busy_hosts:
+                    continue
+
+                failed = [d for d in stage["deps"] if report.get(d, ("ok",))[0] in ("error", "bloqueada")]
+                if failed:
+                    pending.discard(name)
+                    report[name] = ("bloqueada", 0.0, f"falló {', '.join(failed)}")
+                    print(f"⛔ {name}: bloqueada ({', '.join(failed)} falló)")
+                    continue
+
+                digest = None
+                if stage["inputs"] is not None:
+                    digest = inputs_hash(stage["inputs"](), stage["cmd"][1:])
+                    up_to_date = (
+                        state.get(name, {}).get("inputs") == digest
+                        and outputs_exist(stage["outputs"])
+                    )
+                    if up_to_date and not force:
+                        pending.discard(name)
+                        report[name] = ("saltada", 0.0, "entradas sin cambios")
+                        print(f"⏭️  {name}: entradas sin cambios, se salta")
+                        continue
+
+                pending.discard(name)
+                if dry_run:
+                    report[name] = ("plan", 0.0, " ".join(stage["cmd"]))
+                    print(f"📝 {name}: {' '.join(stage['cmd'])}")
+                    continue
+
+                print(f"▶️  {name}")
+                if stage["host"]:
+                    busy_hosts.add(stage["host"])
+                running[pool.submit(run_stage, name, stage)] = (name, digest)
+
+            if not running:
+                if pending and not any(deps_done(n) for n in pending):
+                    raise RuntimeError(f"Dependencias imposibles: {sorted(pending)}")
+                continue
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name, digest = running.pop(future)
+                busy_hosts.discard(graph[name]["host"])
+                code, elapsed, log_path = future.result()
+                if code == 0:
+                    report[name] = ("ok", elapsed, log_path)
+                    print(f"✅ {name} ({elapsed:.1f}s)")
+                    if digest is not None:
+                        state[name] = {"inputs": digest}
+                        save_state(state)
+                else:
+                    report[name] = ("error", elapsed, log_path)
+                    print(f"❌ {name}: código {code}, ver {log_path}")
+
+    return report
+
+
+def print_report(report, wall):
+    print("\n⏱️  Tiempos por etapa")
+    width = max(len(n) for n in report) if report else 10
+    for name, (status, elapsed, detail) in sorted(report.items(), key=lambda kv: -kv[1][1]):
+        print(f"  {name:<{width}}  {status:<9}  {elapsed:8.1f}s  {detail}")
+    print(f"  {'total (reloj)':<{width}}  {'':<9}  {wall:8.1f}s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Ejecuta scrapers -> ingest -> build_index en un solo comando"
+    )
+    parser.add_argument("only", nargs="*", metavar="ETAPA",
+                        help="Ejecutar solo estas etapas (y las que dependen de ellas)")
+    parser.add_argument("--skip-scrapers", action="store_true",
+                        help="No lanzar scrapers: solo ingest y build_index")
+    parser.add_argument("-j", "--jobs", type=int, default=4,
+                        help="Etapas en paralelo como máximo")
+    parser.add_argument("--force", action="store_true",
+                        help="Ejecutar aunque las entradas no hayan cambiado")
+    parser.add_argument("--offline", action="store_true",
+                        help="Scrapers solo desde la caché HTTP")
+    parser.add_argument("--since-last-run", action="store_true",
+                        help="Scrapers por temporada: solo las temporadas abiertas desde la última ejecución")
+    parser.add_argument("--build-args", default=None, metavar="OPCIONES",
+                        help="Opciones para build_index.py, p. ej. \"--index-type ivf --shards\" "
+                             "(por defecto, las del índice actual en index/index_config.json)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Mostrar qué se ejecutaría, sin ejecutar nada")
+    parser.add_argument("--list", action="store_true", help="Listar las etapas y salir")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    graph = stages(args)
+
+    if args.list:
+        for name, stage in graph.items():
+            deps = ", ".join(stage["deps"]) if len(stage["deps"]) < 3 else f"{len(stage['deps'])} scrapers"
+            print(f"{name:<40} host={stage['host'] or '-':<22} deps={deps or '-'}")
+        return 0
+
+    only = list(args.only)
+    if args.skip_scrapers:
+        only = [n for n in only if n not in SCRAPERS] or ["ingest"]
+    selected = selected_stages(graph, only)
+
+    t0 = time.perf_counter()
+    report = run_pipeline(graph, selected, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    print_report(report, time.perf_counter() - t0)
+
+    return 1 if any(status in ("error", "bloqueada") for status, _, _ in report.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
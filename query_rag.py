@@ -1,34 +1,247 @@
 # query_rag.py
+import argparse
 import json
+import sys
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import os
 from openai import OpenAI
+from answer_cache import DEFAULT_SIMILARITY, DEFAULT_TTL, AnswerCache, normalize_question, scope_key
+from context import CONTEXT_TOKENS, build_context
+from embeddings import MODEL_NAME, get_encoder, encode
+from filters import FilterIndex
+from lexical import BM25Index, rrf_fuse
+from record_store import RecordStore
+from shards import ShardSet
 
 INDEX_DIR = "index"
 
-client = OpenAI()
+LLM_MODEL = "gpt-4.1-mini"
 
-def load_index():
-    index = faiss.read_index(os.path.join(INDEX_DIR, "faiss.index"))
-    metadata = []
-    with open(os.path.join(INDEX_DIR, "metadata.jsonl"), "r", encoding="utf-8") as f:
-        for line in f:
-            metadata.append(json.loads(line))
-    return index, metadata
+# Recuperación: "hybrid" (FAISS + BM25 fusionados), "dense" o "lexical"
+RETRIEVAL_MODES = ["hybrid", "dense", "lexical"]
+# Candidatos que aporta cada lado antes de la fusión
+FUSION_CANDIDATES = 50
+
+_client = None
+
+def get_client():
+    # Perezoso: el modo --retrieve-only no necesita credenciales de OpenAI
+    global _client
+    if _client is None:
+        _client = OpenAI()
+    return _client
+
+def load_index(index_dir=INDEX_DIR):
+    index = faiss.read_index(os.path.join(index_dir, "faiss.index"))
+
+    # Índices antiguos (solo IndexFlatL2) no traen configuración
+    config = {}
+    config_path = os.path.join(index_dir, "index_config.json")
+    if os.path.exists(config_path):
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+    # Metadata en disco (mmap): solo se decodifican las filas que devuelve FAISS
+    metadata = RecordStore(os.path.join(index_dir, "metadata"))
+    return index, metadata, config
+
+def search_params(index, nprobe=None, ef_search=None, sel=None):
+    # Parámetros por búsqueda (no tocan el estado compartido del índice);
+    # `sel` limita la búsqueda a un subconjunto de ids (filtros)
+    base = index
+    if isinstance(base, faiss.IndexIDMap):
+        base = faiss.downcast_index(base.index)
+    if isinstance(base, faiss.IndexIVF) and (nprobe or sel is not None):
+        return faiss.SearchParametersIVF(nprobe=nprobe or base.nprobe, sel=sel)
+    if isinstance(base, faiss.IndexHNSW) and (ef_search or sel is not None):
+        return faiss.SearchParametersHNSW(efSearch=ef_search or base.hnsw.efSearch, sel=sel)
+    if sel is not None:
+        return faiss.SearchParameters(sel=sel)
+    return None
+
+
+class Retriever:
+    # Índice + metadata + encoder cargados una sola vez y reutilizados en cada pregunta
+    def __init__(self, index_dir=INDEX_DIR, model_name=MODEL_NAME, nprobe=None, ef_search=None,
+                 mode=None, candidates=FUSION_CANDIDATES, lexical_weight=1.0, route=True):
+        self.index_dir = index_dir
+        self.index, self.metadata, self.config = load_index(index_dir)
+        self.model_name = self.config.get("model", model_name)
+        self.model = get_encoder(self.model_name)
+
+        search = self.config.get("search", {})
+        self.nprobe = nprobe or search.get("nprobe")
+        self.ef_search = ef_search or search.get("efSearch")
+
+        self.docs = RecordStore(os.path.join(index_dir, "docs"))
+
+        # Índices construidos antes de BM25 no traen bm25.npz: solo denso
+        self.lexical = BM25Index(index_dir) if BM25Index.exists(index_dir) else None
+        self.mode = mode or ("hybrid" if self.lexical else "dense")
+        if self.mode != "dense" and self.lexical is None:
+            raise ValueError(f"Modo {self.mode} sin índice BM25: reconstruye con build_index.py")
+        self.candidates = candidates
+        self.lexical_weight = lexical_weight
+
+        # Bitmaps por campo para los filtros (season_year, teams, stage…)
+        self.filters = FilterIndex(index_dir) if FilterIndex.exists(index_dir) else None
+
+        # Shards por temporada/fuente (build_index.py --shards): si están, cada
+        # pregunta se busca solo en los shards que encajan con sus pistas
+        self.shards = None
+        if route and self.config.get("shards") and ShardSet.exists(index_dir):
+            self.shards = ShardSet(index_dir)
+
+    @property
+    def build_id(self):
+        # Índices anteriores a build_id: la fecha del faiss.index hace de id
+        return self.config.get("build_id") or str(os.path.getmtime(os.path.join(self.index_dir, "faiss.index")))
+
+    def settings(self):
+        # Lo que cambia el resultado de una misma pregunta (ámbito de la caché de respuestas)
+        return {
+            "mode": self.mode,
+            "nprobe": self.nprobe,
+            "ef_search": self.ef_search,
+            "candidates": self.candidates,
+            "lexical_weight": self.lexical_weight,
+            "route": self.shards is not None,
+        }
+
+    def get_doc(self, doc_row):
+        # Documento completo (source, type, texto) de un fragmento: get_doc(meta["doc"])
+        return self.docs[doc_row]
+
+    def encode(self, texts, batch_size=32):
+        return encode(texts, model_name=self.model_name, batch_size=batch_size)
+
+    def retrieve(self, query, k=5, nprobe=None, ef_search=None, mode=None, filters=None, qvec=None):
+        qvecs = None if qvec is None else np.asarray(qvec, dtype=np.float32).reshape(1, -1)
+        return self.retrieve_many([query], k, nprobe=nprobe, ef_search=ef_search,
+                                  mode=mode, filters=filters, qvecs=qvecs)[0]
+
+    def filter_mask(self, filters):
+        # Filas de la metadata que cumplen el filtro (None = sin filtro)
+        if not filters:
+            return None
+        if self.filters is None:
+            raise ValueError("El índice no tiene filtros: reconstruye con build_index.py")
+        return self.filters.mask(filters)
+
+    def retrieve_many(self, queries, k=5, batch_size=64, nprobe=None, ef_search=None, mode=None,
+                      filters=None, qvecs=None):
+        """
+        [(metadata, score)] por pregunta. En modo "dense" el score es la
+        distancia de FAISS (menor = mejor); en "hybrid" y "lexical" es la
+        puntuación fusionada / BM25 (mayor = mejor).
+
+        `filters` ({"season_year": 1994, "teams": "Milan", ...}, ver
+        filters.py) restringe la búsqueda a los fragmentos que lo cumplen:
+        FAISS y BM25 solo puntúan ese subconjunto. Con shards, además, cada
+        pregunta solo se busca en los shards a los que la enruta ShardSet.route.
+        `qvecs` (embeddings ya calculados, uno por pregunta) evita codificarlas otra vez.
+        """
+        mode = mode or self.mode
+        allowed = self.filter_mask(filters)
+        if allowed is not None and not allowed.any():
+            return [[] for _ in queries]
+        routes = [self.route(query, filters) for query in queries]
+        if mode == "lexical":
+            return [self.retrieve_lexical(query, k, self.route_mask(allowed, route))
+                    for query, route in zip(queries, routes)]
+
+        # El selector tiene que seguir vivo mientras FAISS lo usa
+        sel = faiss.IDSelectorBatch(self.filters.ids[allowed]) if allowed is not None else None
+        nprobe, ef_search = nprobe or self.nprobe, ef_search or self.ef_search
+        # En híbrido FAISS aporta candidatos para la fusión, no solo los k finales
+        k_dense = k if mode == "dense" else max(k, self.candidates)
+
+        # Un encode y una búsqueda FAISS por lote de preguntas
+        results = []
+        for start in range(0, len(queries), batch_size):
+            batch = queries[start:start + batch_size]
+            batch_routes = routes[start:start + batch_size]
+            if qvecs is None:
+                batch_vecs = self.encode(batch, batch_size=batch_size)
+            else:
+                batch_vecs = np.asarray(qvecs[start:start + batch_size], dtype=np.float32)
+            D, I = self.dense_search(batch_vecs, batch_routes, k_dense, nprobe, ef_search, sel)
+            for row in range(len(batch)):
+                if mode == "dense":
+                    results.append([
+                        (self.metadata.by_id(i), D[row][rank])
+                        for rank, i in enumerate(I[row]) if i != -1
+                    ])
+                else:
+                    dense_ids = [i for i in I[row] if i != -1]
+                    allowed_row = self.route_mask(allowed, batch_routes[row])
+                    results.append(self.fuse(dense_ids, batch[row], k, allowed_row))
+        return results
+
+    def dense_search(self, qvecs, routes, k, nprobe=None, ef_search=None, sel=None):
+        # Las preguntas que se quedan con todos los shards van al índice global
+        # (mismo resultado, sin fan-out); el resto, solo a sus shards en paralelo
+        narrowed = [
+            n for n, route in enumerate(routes)
+            if route is not None and len(route) < len(self.shards.names)
+        ]
+        full = sorted(set(range(len(routes))) - set(narrowed))
+
+        D = np.full((len(routes), k), np.inf, dtype=np.float32)
+        I = np.full((len(routes), k), -1, dtype=np.int64)
+        if full:
+            params = search_params(self.index, nprobe, ef_search, sel=sel)
+            D[full], I[full] = self.index.search(qvecs[full], k, params=params)
+        if narrowed:
+            D[narrowed], I[narrowed] = self.shards.search(
+                qvecs[narrowed], [routes[n] for n in narrowed], k,
+                lambda index: search_params(index, nprobe, ef_search, sel=sel),
+            )
+        return D, I
+
+    def route(self, query, filters=None):
+        # Shards de la pregunta (None = índice global, sin shards)
+        return self.shards.route(query, filters) if self.shards is not None else None
+
+    def route_mask(self, allowed, route):
+        # BM25 se limita a los mismos shards que la búsqueda densa
+        if route is None or len(route) == len(self.shards.names):
+            return allowed
+        in_route = self.shards.row_mask(route)
+        return in_route if allowed is None else allowed & in_route
+
+    def retrieve_lexical(self, query, k=5, allowed=None):
+        ids, scores = self.lexical.search(query, k, allowed)
+        return [(self.metadata.by_id(i), score) for i, score in zip(ids, scores)]
+
+    def fuse(self, dense_ids, query, k, allowed=None):
+        # Ranking denso + ranking BM25 -> k mejores por Reciprocal Rank Fusion
+        lexical_ids, _ = self.lexical.search(query, max(k, self.candidates), allowed)
+        fused = rrf_fuse([dense_ids, lexical_ids], k, weights=[1.0, self.lexical_weight])
+        return [(self.metadata.by_id(i), score) for i, score in fused]
+
+
+_retriever = None
+
+def get_retriever():
+    global _retriever
+    if _retriever is None:
+        _retriever = Retriever()
+    return _retriever
 
 def retrieve(query, k=5):
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    qvec = model.encode([query]).astype("float32")
-    D, I = index.search(qvec, k)
-    return [(metadata[i], D[0][rank]) for rank, i in enumerate(I[0])]
+    return get_retriever().retrieve(query, k)
+
+def retrieve_many(queries, k=5, batch_size=64):
+    return get_retriever().retrieve_many(queries, k, batch_size)
 
-def answer(query, k=5):
-    retrieved = retrieve(query, k)
-    context = "\n\n".join([r[0]["text"] for r in retrieved])
+def build_prompt(query, retrieved, context_tokens=CONTEXT_TOKENS, get_doc=None):
+    # Contexto acotado a context_tokens (ver context.py); get_doc permite
+    # fundir fragmentos solapados o contiguos del mismo documento
+    context, _ = build_context(retrieved, LLM_MODEL, context_tokens, get_doc)
 
-    prompt = f"""
+    return f"""
 Contesta a la pregunta usando SOLO este contexto:
 
 {context}
@@ -37,17 +250,185 @@ Pregunta: {query}
 Respuesta:
 """
 
-    completion = client.chat.completions.create(
-        model="gpt-4.1-mini",
+def complete(prompt):
+    completion = get_client().chat.completions.create(
+        model=LLM_MODEL,
         messages=[{"role": "user", "content": prompt}]
     )
 
-    return completion.choices[0].message["content"]
+    return completion.choices[0].message.content
+
+def sources_of(retrieved):
+    return [
+        {"doc_id": m["doc_id"], "chunk": m.get("chunk"), "score": float(score)}
+        for m, score in retrieved
+    ]
+
+def answer(query, k=5, retriever=None, filters=None, cache=None, context_tokens=CONTEXT_TOKENS):
+    """
+    Respuesta del LLM con los k fragmentos recuperados, en como mucho
+    context_tokens tokens de contexto. Con `cache` (AnswerCache), las
+    preguntas repetidas o casi iguales se contestan desde la caché sin FAISS
+    ni LLM.
+    """
+    retriever = retriever or get_retriever()
+    if cache is None:
+        retrieved = retriever.retrieve(query, k, filters=filters)
+        return complete(build_prompt(query, retrieved, context_tokens, retriever.get_doc))
+
+    scope = scope_key(k, filters, context_tokens, retriever.settings())
+    entry, vec = cache.lookup(query, scope, encode=lambda q: retriever.encode([q])[0])
+    if entry is not None:
+        return entry["answer"]
+    retrieved = retriever.retrieve(query, k, filters=filters, qvec=vec)
+    text = complete(build_prompt(query, retrieved, context_tokens, retriever.get_doc))
+    cache.put(query, scope, text, sources_of(retrieved), vec)
+    return text
+
+def read_questions(path):
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        return [line.strip() for line in f if line.strip()]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def run_batch(retriever, questions, out, k=5, batch_size=64, retrieve_only=False, filters=None,
+              cache=None, context_tokens=CONTEXT_TOKENS):
+    # Con caché, solo se recuperan y se mandan al LLM las preguntas que no
+    # están (ni repetidas dentro del propio lote: esas copian el registro de la primera)
+    use_cache = cache is not None and not retrieve_only
+    scope = scope_key(k, filters, context_tokens, retriever.settings())
+    cached, repeated, vecs = {}, {}, {}
+    if use_cache:
+        first = {}
+        for n, q in enumerate(questions):
+            entry = cache.get(q, scope)
+            if entry is not None:
+                cached[n] = entry
+            elif normalize_question(q) in first:
+                repeated[n] = first[normalize_question(q)]
+            else:
+                first[normalize_question(q)] = n
+        pending = list(first.values())
+        if pending:
+            qvecs = retriever.encode([questions[n] for n in pending], batch_size=batch_size)
+            for n, vec in zip(pending, qvecs):
+                entry = cache.get_similar(questions[n], scope, vec)
+                if entry is not None:
+                    cached[n] = entry
+                else:
+                    vecs[n] = vec
+
+    pending = [n for n in range(len(questions)) if n not in cached and n not in repeated]
+    # Los embeddings de la búsqueda semántica en caché sirven también para FAISS
+    qvecs = np.stack([vecs[n] for n in pending]) if use_cache and pending else None
+    all_retrieved = retriever.retrieve_many([questions[n] for n in pending], k, batch_size,
+                                            filters=filters, qvecs=qvecs)
+    retrieved_by_row = dict(zip(pending, all_retrieved))
+
+    records = {}
+    for n, q in enumerate(questions):
+        if n in repeated:
+            # La entrada de la primera puede haber salido ya de la caché (LRU/TTL)
+            record = {**records[repeated[n]], "question": q, "cached": True}
+            cache.count_repeat()
+        elif n in cached:
+            record = {"question": q, "sources": cached[n]["sources"],
+                      "answer": cached[n]["answer"], "cached": True}
+        else:
+            retrieved = retrieved_by_row[n]
+            record = {"question": q, "sources": sources_of(retrieved)}
+            if not retrieve_only:
+                record["answer"] = complete(
+                    build_prompt(q, retrieved, context_tokens, retriever.get_doc))
+                if use_cache:
+                    cache.put(q, scope, record["answer"], record["sources"], vecs.get(n))
+        records[n] = record
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Preguntas RAG sobre la Champions")
+    parser.add_argument("--batch", metavar="FICHERO",
+                        help="Fichero con una pregunta por línea ('-' para stdin)")
+    parser.add_argument("--out", default="-",
+                        help="Salida JSONL del modo batch ('-' para stdout)")
+    parser.add_argument("-k", type=int, default=5, help="Nº de fragmentos por pregunta")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--context-tokens", type=int, default=CONTEXT_TOKENS,
+                        help="Tokens máximos de contexto en el prompt")
+    parser.add_argument("--retrieve-only", action="store_true",
+                        help="Solo recuperación, sin llamar al LLM")
+    parser.add_argument("--nprobe", type=int, default=None,
+                        help="Listas IVF a visitar (por defecto, las del build)")
+    parser.add_argument("--ef-search", type=int, default=None,
+                        help="efSearch HNSW (por defecto, el del build)")
+    parser.add_argument("--mode", choices=RETRIEVAL_MODES, default=None,
+                        help="Recuperación (por defecto, hybrid si el índice tiene BM25)")
+    parser.add_argument("--candidates", type=int, default=FUSION_CANDIDATES,
+                        help="Candidatos de FAISS y de BM25 antes de fusionar")
+    parser.add_argument("--no-route", action="store_true",
+                        help="Buscar en el índice global aunque haya shards")
+    # Caché de respuestas (answer_cache.py)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No reutilizar respuestas de preguntas repetidas")
+    parser.add_argument("--cache-file", default=None,
+                        help="SQLite donde guardar la caché entre ejecuciones (por defecto, solo memoria)")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL,
+                        help="Segundos que vale una respuesta en caché")
+    parser.add_argument("--cache-similarity", type=float, default=DEFAULT_SIMILARITY,
+                        help="Coseno mínimo para reutilizar la respuesta de una pregunta parecida")
+    # Filtros (repetibles: OR dentro de un campo, AND entre campos)
+    parser.add_argument("--season", type=int, action="append", metavar="AÑO",
+                        help="Temporada por año de inicio (1994 = 1994-95)")
+    parser.add_argument("--team", action="append", help="Equipo (sin acentos ni FC/AC da igual)")
+    parser.add_argument("--stage", action="append", help="Fase: 'Group Stage', 'Final'…")
+    parser.add_argument("--source", action="append",
+                        help="Familia de fuente: partidos, uefa, transfermarkt, docs")
+    parser.add_argument("--type", action="append",
+                        help="Tipo de documento: match_row, schema, summary, markdown")
+    return parser.parse_args()
+
+def filters_from_args(args):
+    filters = {
+        "season_year": args.season,
+        "teams": args.team,
+        "stage": args.stage,
+        "source_family": args.source,
+        "type": args.type,
+    }
+    return {field: values for field, values in filters.items() if values}
 
 if __name__ == "__main__":
-    index, metadata = load_index()
+    args = parse_args()
+    retriever = Retriever(nprobe=args.nprobe, ef_search=args.ef_search,
+                          mode=args.mode, candidates=args.candidates, route=not args.no_route)
+    filters = filters_from_args(args)
+    cache = None
+    if not args.no_cache:
+        cache = AnswerCache(retriever.build_id, path=args.cache_file, ttl=args.cache_ttl,
+                            similarity=args.cache_similarity)
+
+    if args.batch:
+        questions = read_questions(args.batch)
+        out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+        try:
+            run_batch(retriever, questions, out, k=args.k, batch_size=args.batch_size,
+                      retrieve_only=args.retrieve_only, filters=filters, cache=cache,
+                      context_tokens=args.context_tokens)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if cache is not None and not args.retrieve_only:
+            print(f"🗃️  Caché: {cache.stats()}", file=sys.stderr)
+        sys.exit(0)
 
-    while True:
-        q = input("\n❓ Pregunta: ")
-        print("\n📌 Respuesta:")
-        print(answer(q))
+    try:
+        while True:
+            q = input("\n❓ Pregunta: ")
+            print("\n📌 Respuesta:")
+            print(answer(q, k=args.k, retriever=retriever, filters=filters, cache=cache,
+                         context_tokens=args.context_tokens))
+    except (EOFError, KeyboardInterrupt):
+        if cache is not None:
+            print(f"\n🗃️  Caché: {cache.stats()}")
@@ -0,0 +1,103 @@
+# record_store.py
+import json
+import mmap
+import os
+from array import array
+import numpy as np
+
+# Almacén de registros JSON de acceso aleatorio:
+#   <prefijo>.bin          registros JSON (utf-8) concatenados
+#   <prefijo>.offsets.npy  n+1 offsets int64; el registro i es bin[off[i]:off[i+1]]
+# Abrirlo no lee los registros: solo se decodifican los que se piden.
+# Opcionalmente, <prefijo>.ids.npy / <prefijo>.idrows.npy permiten buscar
+# por id estable (los ids de un IndexIDMap de FAISS) en lugar de por fila.
+
+def store_paths(prefix):
+    return prefix + ".bin", prefix + ".offsets.npy"
+
+def save_npy_atomic(path, array_):
+    # Fichero temporal + os.replace: nunca queda un .npy a medio escribir
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array_)
+    os.replace(tmp, path)
+
+def write_id_index(prefix, ids):
+    ids = np.asarray(ids, dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    save_npy_atomic(prefix + ".idrows.npy", order.astype(np.int64))
+    save_npy_atomic(prefix + ".ids.npy", ids[order])
+
+
+class RecordStoreWriter:
+    def __init__(self, prefix):
+        self.bin_path, self.offsets_path = store_paths(prefix)
+        self._f = open(self.bin_path, "wb")
+        self._offsets = array("q", [0])
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def append(self, record):
+        data = json.dumps(record, ensure_ascii=False).encode("utf-8")
+        self._f.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+        return len(self._offsets) - 2
+
+    def close(self):
+        self._f.close()
+        np.save(self.offsets_path, np.frombuffer(self._offsets, dtype=np.int64))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordStore:
+    def __init__(self, prefix):
+        bin_path, offsets_path = store_paths(prefix)
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+        self.ids = self.id_rows = None
+        if os.path.exists(prefix + ".ids.npy"):
+            self.ids = np.load(prefix + ".ids.npy", mmap_mode="r")
+            self.id_rows = np.load(prefix + ".idrows.npy", mmap_mode="r")
+        self._f = open(bin_path, "rb")
+        # mmap no admite ficheros vacíos
+        if os.fstat(self._f.fileno()).st_size:
+            self._data = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._data = b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return json.loads(self._data[self.offsets[i]:self.offsets[i + 1]])
+
+    def row_of(self, record_id):
+        # Sin índice de ids, el id es directamente la fila
+        if self.ids is None:
+            return int(record_id)
+        pos = int(np.searchsorted(self.ids, record_id))
+        if pos == len(self.ids) or self.ids[pos] != record_id:
+            raise KeyError(record_id)
+        return int(self.id_rows[pos])
+
+    def by_id(self, record_id):
+        return self[self.row_of(record_id)]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._f.close()
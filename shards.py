@@ -0,0 +1,222 @@
+# shards.py
+import json
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import faiss
+import numpy as np
+from filters import normalize_value
+from utils import fold_text
+
+# Sub-índices FAISS por temporada y por familia de fuente.
+#
+# El corpus mezcla ~7k filas de partidos (una temporada por fichero) con
+# schemas/resúmenes y ensayos en markdown. Con `build_index.py --shards`,
+# además del índice global se escribe un shard por temporada de partidos
+# (partidos_1994, …) y uno por cada otra familia (uefa, transfermarkt, docs):
+#   shards/<nombre>.faiss   mismo tipo de índice que el global (clon entrenado)
+#   shards/rows.npy         shard de cada fila de la metadata
+#   shards/manifest.json    nombre -> fichero, nº de vectores, temporada, familia
+# Los ids son los mismos que en el índice global, así que metadata, BM25 y
+# filtros se comparten. query_rag enruta cada pregunta a los shards que
+# encajan con sus pistas de temporada/fuente y solo busca en esos (en
+# paralelo si son varios); sin ninguna pista usa el índice global.
+
+SHARDS_DIR = "shards"
+SEASON_FAMILY = "partidos"
+
+# Palabras que apuntan a una familia de fuente concreta (texto ya sin acentos)
+SOURCE_HINTS = {
+    "transfermarkt": ["goleador", "goleadores", "asistencias", "fair play", "deportividad",
+                      "tarjetas", "clasificacion historica", "transfermarkt"],
+    "uefa": ["estadisticas", "minutos", "pases", "regates", "paradas", "distancia recorrida",
+             "velocidad", "compstats"],
+    "docs": ["historia", "formato", "curiosidades", "anecdotas", "tactica", "tacticas",
+             "entrenadores", "leyendas", "remontadas"],
+}
+
+# "1994-95", "1994–95", "1994/95" -> 1994; "94/95" -> 1994; "2005" -> 2004 y 2005
+_SEASON_LONG = re.compile(r"\b((?:19|20)\d{2})\s*[-/]\s*(\d{2})\b")
+_SEASON_SHORT = re.compile(r"\b(\d{2})/(\d{2})\b")
+_YEAR = re.compile(r"\b((?:19|20)\d{2})\b")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def shard_key(doc):
+    family = doc.get("source_family") or "otros"
+    if family == SEASON_FAMILY and doc.get("season_year") is not None:
+        return f"{family}_{doc['season_year']}"
+    return family
+
+
+def season_hints(question):
+    text = fold_text(question)
+    seasons = set()
+    for start, end in _SEASON_LONG.findall(text):
+        if (int(start) + 1) % 100 == int(end):
+            seasons.add(int(start))
+    text = _SEASON_LONG.sub(" ", text)
+    for start, end in _SEASON_SHORT.findall(text):
+        if (int(start) + 1) % 100 == int(end):
+            seasons.add(int(start) + (1900 if int(start) >= 50 else 2000))
+    text = _SEASON_SHORT.sub(" ", text)
+    # Un año suelto puede ser de dos temporadas (la final de 2005 es de la 2004-05)
+    for year in _YEAR.findall(text):
+        seasons.update((int(year) - 1, int(year)))
+    return seasons
+
+
+def source_hints(question):
+    # Palabras enteras ("pases" no casa con "pasesito"; "fair play" como dos seguidas)
+    text = " " + " ".join(_WORD.findall(fold_text(question))) + " "
+    return {family for family, words in SOURCE_HINTS.items()
+            if any(f" {w} " in text for w in words)}
+
+def as_set(value):
+    if value is None:
+        return set()
+    return set(value) if isinstance(value, (list, tuple, set)) else {value}
+
+
+def shard_paths(index_dir):
+    base = os.path.join(index_dir, SHARDS_DIR)
+    return base, os.path.join(base, "manifest.json"), os.path.join(base, "rows.npy")
+
+
+class ShardWriter:
+    # Se alimenta por lotes durante el build, con los vectores de TODOS los fragmentos
+    def __init__(self, template):
+        # Índice global vacío pero entrenado: cada shard es un clon suyo
+        self.template = faiss.clone_index(template)
+        self.template.reset()
+        self.indexes = {}
+        self.names = []           # en orden de aparición
+        self.ordinal = {}
+        self.seasons = {}
+        self.rows = []
+
+    def add(self, docs, ids, vecs):
+        # docs[n] es el documento del fragmento con id ids[n] y vector vecs[n]
+        groups = defaultdict(list)
+        for n, doc in enumerate(docs):
+            key = shard_key(doc)
+            if key not in self.indexes:
+                self.indexes[key] = faiss.clone_index(self.template)
+                self.ordinal[key] = len(self.names)
+                self.names.append(key)
+                self.seasons[key] = doc.get("season_year") if key.startswith(SEASON_FAMILY + "_") else None
+            groups[key].append(n)
+            self.rows.append(self.ordinal[key])
+        for key, members in groups.items():
+            self.indexes[key].add_with_ids(vecs[members], ids[members])
+
+    def save(self, index_dir):
+        base, manifest_path, rows_path = shard_paths(index_dir)
+        os.makedirs(base, exist_ok=True)
+        # Fuera los shards de builds anteriores que ya no existen
+        for name in os.listdir(base):
+            if name.endswith(".faiss"):
+                os.remove(os.path.join(base, name))
+
+        shards = {}
+        for key in self.names:
+            filename = f"{key}.faiss"
+            faiss.write_index(self.indexes[key], os.path.join(base, filename))
+            shards[key] = {
+                "file": filename,
+                "n_vectors": int(self.indexes[key].ntotal),
+                "season_year": self.seasons[key],
+                "source_family": key.split("_")[0],
+            }
+        np.save(rows_path, np.array(self.rows, dtype=np.int16))
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"names": self.names, "shards": shards}, f, ensure_ascii=False, indent=2)
+        return {"n_shards": len(shards), "largest": max((s["n_vectors"] for s in shards.values()), default=0)}
+
+
+class ShardSet:
+    def __init__(self, index_dir, max_workers=8):
+        base, manifest_path, rows_path = shard_paths(index_dir)
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.names = manifest["names"]
+        self.info = manifest["shards"]
+        self.indexes = {
+            name: faiss.read_index(os.path.join(base, self.info[name]["file"]))
+            for name in self.names
+        }
+        self.row_shard = np.load(rows_path)
+        self.pool = ThreadPoolExecutor(max_workers=min(max_workers, len(self.names)) or 1)
+
+    @staticmethod
+    def exists(index_dir):
+        _, manifest_path, rows_path = shard_paths(index_dir)
+        return os.path.exists(manifest_path) and os.path.exists(rows_path)
+
+    def route(self, question, filters=None):
+        """
+        Shards en los que buscar: los que encajan con las pistas de la pregunta (o todos).
+        El filtro source_family es estricto; las palabras de fuente solo son
+        una pista y nunca quitan los partidos de la temporada que se nombra
+        ("goleadores 1999/00" busca en transfermarkt y en partidos_1999).
+        """
+        filters = filters or {}
+        seasons = {normalize_value("season_year", s) for s in as_set(filters.get("season_year"))}
+        seasons = seasons or season_hints(question)
+        strict = {normalize_value("source_family", f) for f in as_set(filters.get("source_family"))}
+        hinted = set() if strict else source_hints(question)
+
+        selected = []
+        for name in self.names:
+            family, season = self.info[name]["source_family"], self.info[name]["season_year"]
+            if strict and family not in strict:
+                continue
+            # Las pistas de temporada descartan los partidos de otras temporadas
+            if seasons and season is not None and season not in seasons:
+                continue
+            if hinted and family not in hinted and not (seasons and season is not None):
+                continue
+            selected.append(name)
+        return selected or list(self.names)
+
+    def row_mask(self, names):
+        # Filas de la metadata que viven en esos shards (para limitar BM25 igual)
+        ordinal = {name: n for n, name in enumerate(self.names)}
+        wanted = [ordinal[n] for n in names]
+        return np.isin(self.row_shard, wanted)
+
+    def search(self, qvecs, routes, k, params_for=None):
+        """
+        Búsqueda de cada pregunta solo en sus shards. Las preguntas se agrupan
+        por shard (una búsqueda FAISS por shard) y los shards van en paralelo;
+        los resultados se mezclan por distancia. Devuelve (D, I) como FAISS.
+        """
+        by_shard = defaultdict(list)
+        for row, names in enumerate(routes):
+            for name in names:
+                by_shard[name].append(row)
+
+        def search_shard(name):
+            index = self.indexes[name]
+            rows = by_shard[name]
+            params = params_for(index) if params_for else None
+            D, I = index.search(qvecs[rows], min(k, max(index.ntotal, 1)), params=params)
+            return rows, D, I
+
+        partial = defaultdict(list)
+        for rows, D, I in self.pool.map(search_shard, list(by_shard)):
+            for n, row in enumerate(rows):
+                partial[row].append((D[n], I[n]))
+
+        D_out = np.full((len(routes), k), np.inf, dtype=np.float32)
+        I_out = np.full((len(routes), k), -1, dtype=np.int64)
+        for row, parts in partial.items():
+            D_all = np.concatenate([d for d, _ in parts])
+            I_all = np.concatenate([i for _, i in parts])
+            valid = I_all != -1
+            D_all, I_all = D_all[valid], I_all[valid]
+            top = np.argsort(D_all, kind="stable")[:k]
+            D_out[row, :len(top)] = D_all[top]
+            I_out[row, :len(top)] = I_all[top]
+        return D_out, I_out
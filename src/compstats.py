@@ -0,0 +1,379 @@
+import os
+import pandas as pd
+import warnings
+from scraping_utils import (
+    fetch, scraper_arg_parser, apply_scraper_args, selected_seasons,
+    save_seasons_csv, mark_run, run_jobs, safe_num,
+)
+
+# Opcional: ocultar el FutureWarning de pandas sobre concat
+warnings.filterwarnings(
+    "ignore",
+    category=FutureWarning,
+    message="The behavior of DataFrame concatenation with empty or all-NA entries is deprecated.*"
+)
+
+# Lo común a los rankings de compstats UEFA (clubes y jugadores): peticiones,
+# paginación, tabla ancha tipada, CSV por grupo y el flujo del script. Cada
+# scraper solo declara su Ranking: URL, columnas de contexto y stats.
+
+# Stats que se piden como mucho en una misma petición. La unión de todos
+# los grupos cabe en una, así que cada temporada es una sola llamada
+MAX_STATS_PER_REQUEST = 50
+
+# La API devuelve como mucho PAGE_SIZE entradas por petición; las páginas
+# siguientes se piden de PAGES_PER_ROUND en PAGES_PER_ROUND en paralelo
+PAGE_SIZE = 200
+PAGES_PER_ROUND = 4
+# Tope de páginas por ranking (una temporada ronda los 800 jugadores)
+MAX_PAGES = 25
+
+
+# Contexto de temporada y equipo (team_row), común a clubes y jugadores
+TEAM_COLUMNS = [
+    "season_year",
+    "team_id",
+    "team_code",
+    "team_name_en",
+    "team_name_es",
+    "country_en",
+    "country_es",
+]
+
+
+def team_row(entry: dict, season_year: int) -> dict:
+    """Columnas de contexto (temporada, equipo) de una entrada del ranking."""
+    team = entry.get("team", {}) or {}
+    translations = team.get("translations", {}) or {}
+    display_name = translations.get("displayName", {}) or {}
+    country_name = translations.get("countryName", {}) or {}
+
+    return {
+        "season_year": season_year,
+        "team_id": entry.get("teamId"),
+        "team_code": team.get("teamCode"),
+        "team_name_en": display_name.get("EN"),
+        "team_name_es": display_name.get("ES"),
+        "country_en": country_name.get("EN"),
+        "country_es": country_name.get("ES"),
+    }
+
+
+class Ranking:
+    """
+    Un ranking de compstats y cómo se guarda:
+      name            nombre del scraper (estado de --since-last-run)
+      description     descripción de la línea de comandos
+      url             endpoint del ranking
+      optional_fields optionalFields de la petición (TEAM, PLAYER,TEAM…)
+      row             row(entry, season_year) -> columnas de contexto
+      entry_key       entry_key(entry) -> id de la entrada (None si no tiene)
+      base_columns    columnas de contexto, siempre delante de las stats
+      id_columns      identificadores, enteros en la tabla ancha
+      numeric_columns columnas de contexto numéricas (no identificadores)
+      stat_groups     {grupo: [stats]} tal y como las llama la API
+      file_prefix     data/uefa/ucl_{file_prefix}_…_stats_1992_2025.csv
+      paginated       pedir todas las páginas (si no, una de PAGE_SIZE)
+      label           coletilla de los mensajes por grupo (" de CLUBES")
+    """
+
+    def __init__(self, name, description, url, optional_fields, row, entry_key,
+                 base_columns, id_columns, stat_groups, file_prefix,
+                 numeric_columns=(), paginated=False, label=""):
+        self.name = name
+        self.description = description
+        self.url = url
+        self.optional_fields = optional_fields
+        self.row = row
+        self.entry_key = entry_key
+        self.base_columns = base_columns
+        self.id_columns = id_columns
+        self.numeric_columns = list(numeric_columns)
+        self.stat_groups = stat_groups
+        self.file_prefix = file_prefix
+        self.paginated = paginated
+        self.label = label
+        # Temporadas cuya descarga ha fallado en esta ejecución: si hay alguna,
+        # la ejecución no se apunta y --since-last-run las vuelve a pedir
+        self.failed_seasons = set()
+
+    # ------------------------------------------------------------------
+    # Peticiones
+    # ------------------------------------------------------------------
+
+    def fetch_ranking(self, season_year: int, stats_list, limit: int = PAGE_SIZE, offset: int = 0) -> list:
+        """Una petición al ranking: lista de entradas tal cual las da la API."""
+        params = {
+            "competitionId": "1",             # UEFA Champions League
+            "limit": str(limit),
+            "offset": str(offset),
+            "optionalFields": self.optional_fields,
+            "order": "DESC",
+            "phase": "TOURNAMENT",
+            "seasonYear": str(season_year),
+            "stats": ",".join(stats_list),
+        }
+
+        r = fetch(self.url, params=params, season=season_year)
+        r.raise_for_status()
+        return r.json()
+
+    def fetch_all_rankings(self, season_year: int, stats_list) -> list:
+        """
+        Ranking completo de una temporada, página a página (limit/offset). Tras
+        la primera, las páginas se piden por rondas en paralelo; el ritmo lo
+        sigue marcando el limitador de fetch(). Las entradas repetidas entre
+        páginas (empates que cambian de sitio) se quitan por entry_key.
+
+        Se para en la primera página incompleta, en la primera que no trae
+        ningún id nuevo (la API ignora o recorta `offset` y repite la misma
+        página) o a las MAX_PAGES páginas.
+        """
+        dedup = EntryDedup(self.entry_key)
+        first = self.fetch_ranking(season_year, stats_list, limit=PAGE_SIZE, offset=0)
+        dedup.add(first)
+        more = len(first) == PAGE_SIZE
+        offset = PAGE_SIZE
+        pages_fetched = 1
+
+        while more:
+            round_size = min(PAGES_PER_ROUND, MAX_PAGES - pages_fetched)
+            if round_size <= 0:
+                print(f"    ⚠️ Temporada {season_year}: límite de {MAX_PAGES} páginas alcanzado")
+                break
+            offsets = [offset + i * PAGE_SIZE for i in range(round_size)]
+            pages = run_jobs(
+                lambda off: self.fetch_ranking(season_year, stats_list, limit=PAGE_SIZE, offset=off),
+                offsets,
+                max_workers=round_size,
+            )
+            pages_fetched += round_size
+            for page in pages:
+                if dedup.add(page) == 0 or len(page) < PAGE_SIZE:
+                    more = False
+                    break
+            offset += round_size * PAGE_SIZE
+
+        return dedup.entries
+
+    def fetch_entries(self, season_year: int, stats_list) -> list:
+        if self.paginated:
+            return self.fetch_all_rankings(season_year, stats_list)
+        return self.fetch_ranking(season_year, stats_list)
+
+    # ------------------------------------------------------------------
+    # Tablas
+    # ------------------------------------------------------------------
+
+    def scrape_stats_group(self, season_year: int, stats_list, group_name: str) -> pd.DataFrame:
+        """
+        Estadísticas de una temporada y un grupo de stats.
+        Devuelve un DataFrame con las columnas de contexto + stats del grupo.
+        """
+        rows = []
+        for entry in self.fetch_entries(season_year, stats_list):
+            row = self.row(entry, season_year)
+
+            # Estadísticas del grupo
+            stats_dict = entry_stats(entry)
+            for stat in stats_list:
+                row[f"{group_name}__{stat}"] = safe_num(stats_dict.get(stat))
+
+            rows.append(row)
+
+        return pd.DataFrame(rows)
+
+    def scrape_season_stats(self, season_year: int, stats_list) -> pd.DataFrame:
+        """
+        Todas las stats de una temporada en el mínimo de peticiones
+        (MAX_STATS_PER_REQUEST por llamada). Una fila por entrada
+        (entry_key), con cada stat una sola vez y sin prefijo de grupo.
+        """
+        rows = {}
+        for start in range(0, len(stats_list), MAX_STATS_PER_REQUEST):
+            chunk = stats_list[start:start + MAX_STATS_PER_REQUEST]
+            for entry in self.fetch_entries(season_year, chunk):
+                entry_id = self.entry_key(entry)
+                key = entry_id if entry_id is not None else ("sin_id", len(rows))
+                row = rows.setdefault(key, self.row(entry, season_year))
+                stats_dict = entry_stats(entry)
+                for stat in chunk:
+                    row[stat] = safe_num(stats_dict.get(stat))
+
+        return pd.DataFrame(list(rows.values()))
+
+    def order_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Columnas de contexto delante, en el orden de base_columns; las stats detrás."""
+        base_cols = [c for c in self.base_columns if c in df.columns]
+        other_cols = [c for c in df.columns if c not in base_cols]
+        return df[base_cols + other_cols]
+
+    def typed_stats_table(self, df: pd.DataFrame, stats_list) -> pd.DataFrame:
+        """
+        Tabla ancha con tipos fijos: ids enteros (Int64, admite nulos), stats
+        float64 y el resto texto, para no depender de lo que infiera pandas.
+        """
+        df = df.reindex(columns=[c for c in self.base_columns if c in df.columns] + list(stats_list))
+        for col in self.id_columns:
+            if col in df.columns:
+                nums = pd.to_numeric(df[col], errors="coerce")
+                # Solo si todos los ids son numéricos: si no, se quedan como texto
+                if nums.notna().sum() == df[col].notna().sum():
+                    df[col] = nums.astype("Int64")
+        float_cols = list(stats_list) + [c for c in self.numeric_columns if c in df.columns]
+        df[float_cols] = df[float_cols].astype("float64")
+        text_cols = [c for c in df.columns if c not in self.id_columns and c not in float_cols]
+        df[text_cols] = df[text_cols].astype("string")
+        return df
+
+    def group_table(self, wide: pd.DataFrame, group_name: str, stats_list) -> pd.DataFrame:
+        """Formato antiguo de un grupo a partir de la tabla ancha: stats como `grupo__stat`."""
+        base_cols = [c for c in self.base_columns if c in wide.columns]
+        return wide[base_cols + list(stats_list)].rename(
+            columns={stat: f"{group_name}__{stat}" for stat in stats_list}
+        )
+
+    # ------------------------------------------------------------------
+    # Trabajos del pool
+    # ------------------------------------------------------------------
+
+    def scrape_job(self, job) -> pd.DataFrame:
+        """Un (grupo, stats, temporada); los errores se informan y dan un DF vacío."""
+        group_name, stats_list, season = job
+        print(f"  ➤ {group_name}: temporada {season}/{season+1}…")
+        try:
+            return self.scrape_stats_group(season, stats_list, group_name)
+        except Exception as e:
+            print(f"    ⚠️ Error en {group_name}, temporada {season}: {e}")
+            self.failed_seasons.add(season)
+            return pd.DataFrame()
+
+    def scrape_season_job(self, job) -> pd.DataFrame:
+        """Una temporada con todas las stats; los errores se informan y dan un DF vacío."""
+        stats_list, season = job
+        print(f"  ➤ temporada {season}/{season+1}…")
+        try:
+            return self.scrape_season_stats(season, stats_list)
+        except Exception as e:
+            print(f"    ⚠️ Error en temporada {season}: {e}")
+            self.failed_seasons.add(season)
+            return pd.DataFrame()
+
+    # ------------------------------------------------------------------
+    # Script
+    # ------------------------------------------------------------------
+
+    def main(self):
+        parser = scraper_arg_parser(self.description, seasons=True)
+        parser.add_argument("--per-group-requests", action="store_true",
+                            help="Una petición por grupo y temporada (modo antiguo) en vez de una por temporada")
+        parser.add_argument("--no-group-files", action="store_true",
+                            help="Escribir solo la tabla ancha, sin los CSV por grupo")
+        args = apply_scraper_args(parser)
+
+        SEASONS, incremental = selected_seasons(args, self.name)
+        os.makedirs("data/uefa", exist_ok=True)
+
+        group_tables = {}
+
+        if args.per_group_requests:
+            # Todas las combinaciones grupo/temporada en paralelo: el ritmo lo marca
+            # el limitador por host de fetch(), no un sleep por petición
+            jobs = [
+                (group_name, stats_list, season)
+                for group_name, stats_list in self.stat_groups.items()
+                for season in SEASONS
+            ]
+            print(f"\n📊 Descargando {len(jobs)} combinaciones grupo/temporada…")
+            results = dict(zip(
+                [(group_name, season) for group_name, _, season in jobs],
+                run_jobs(self.scrape_job, jobs),
+            ))
+
+            for group_name in self.stat_groups:
+                all_dfs = [results[(group_name, season)] for season in SEASONS]
+
+                # Filtramos DF vacíos y DF con todas las celdas a NaN
+                all_dfs = [
+                    df for df in all_dfs
+                    if not df.empty and not df.isna().all().all()
+                ]
+                if all_dfs:
+                    group_tables[group_name] = pd.concat(all_dfs, ignore_index=True)
+        else:
+            # Unión de stats de todos los grupos (matches_appearance y compañía una sola vez):
+            # una petición por temporada en lugar de una por grupo y temporada
+            all_stats = list(dict.fromkeys(
+                stat for stats_list in self.stat_groups.values() for stat in stats_list
+            ))
+            print(f"\n📊 Descargando {len(all_stats)} stats de {len(SEASONS)} temporadas…")
+            season_dfs = [
+                df for df in run_jobs(self.scrape_season_job, [(all_stats, season) for season in SEASONS])
+                if not df.empty
+            ]
+
+            if season_dfs:
+                wide = self.typed_stats_table(pd.concat(season_dfs, ignore_index=True), all_stats)
+                file_name = f"data/uefa/ucl_{self.file_prefix}_all_stats_1992_2025.csv"
+                save_seasons_csv(file_name, wide, "season_year", incremental,
+                                 failed=self.failed_seasons)
+                print(f"📁 Tabla ancha guardada: {file_name} ({wide.shape[0]} filas, {wide.shape[1]} columnas)")
+
+                group_tables = {
+                    group_name: self.group_table(wide, group_name, stats_list)
+                    for group_name, stats_list in self.stat_groups.items()
+                }
+            else:
+                print("❌ No se han generado datos.")
+
+        # CSV por grupo, con el formato de siempre
+        if args.per_group_requests or not args.no_group_files:
+            for group_name in self.stat_groups:
+                print(f"\n📊 Extrayendo estadísticas{self.label}: {group_name}")
+                final_df = group_tables.get(group_name)
+
+                if final_df is not None:
+                    # No borramos columnas 100% NaN para no cargarnos ninguna stat
+                    # (top_speed, distance_covered…). Si luego quieres limpiar, puedes
+                    # descomentar esto:
+                    # final_df = final_df.dropna(axis=1, how="all")
+
+                    # Ordenamos las columnas para que los datos básicos siempre estén delante
+                    final_df = self.order_columns(final_df)
+
+                    file_name = f"data/uefa/ucl_{self.file_prefix}_{group_name}_stats_1992_2025.csv"
+                    save_seasons_csv(file_name, final_df, "season_year", incremental,
+                                     failed=self.failed_seasons)
+                    print(f"📁 Guardado correctamente: {file_name}")
+                else:
+                    print(f"❌ No se han generado datos para {group_name}.")
+
+        mark_run(self.name, self.failed_seasons)
+
+
+class EntryDedup:
+    """Primera aparición de cada id (las entradas sin id se conservan)."""
+
+    def __init__(self, entry_key):
+        self.entry_key = entry_key
+        self.seen = set()
+        self.entries = []
+
+    def add(self, page: list) -> int:
+        """Añade una página; devuelve cuántos ids nuevos trae."""
+        new = 0
+        for entry in page:
+            entry_id = self.entry_key(entry)
+            if entry_id is not None:
+                if entry_id in self.seen:
+                    continue
+                self.seen.add(entry_id)
+                new += 1
+            self.entries.append(entry)
+        return new
+
+
+def entry_stats(entry: dict) -> dict:
+    stats_list_resp = entry.get("statistics", []) or []
+    return {s.get("name"): s.get("value") for s in stats_list_resp}
+
@@ -1,18 +1,19 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 import os
 import re
+from scraping_utils import fetch, parse_scraper_args
+from tm_tables import parse_items_table, text, link
 
 URL = "https://www.transfermarkt.es/uefa-champions-league/alleEndspiele/pokalwettbewerb/CL"
 
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/124.0 Safari/537.36"
-    )
-}
+# Columnas de la tabla de finales (td de primer nivel); el visitante es
+# siempre la última celda
+FINALS_COLUMNS = [
+    ("Season", 0, text()),
+    ("HomeTeam", 1, link(default=text(sep=" ", none_if_empty=True))),
+    ("Result_raw", 3, text(sep=" ")),
+    ("AwayTeam", -1, link(default=text(sep=" ", none_if_empty=True))),
+]
 
 
 def parse_score(text: str):
@@ -35,69 +36,30 @@ def scrape_cl_finals_transfermarkt():
     print(f"🌍 Descargando todas las finales de Champions:\n{URL}")
 
     # 1) Descargar HTML
-    resp = requests.get(URL, headers=HEADERS, timeout=20)
+    resp = fetch(URL)
     print("   Status code:", resp.status_code)
     resp.raise_for_status()
 
-    # 2) Parsear con BeautifulSoup
-    soup = BeautifulSoup(resp.text, "lxml")
-
-    # 3) Localizar tabla de finales
-    table = soup.find("table", class_="items")
-    if table is None:
+    # 2) Extraer la tabla de finales
+    records = parse_items_table(resp.text, FINALS_COLUMNS, min_cells=6)
+    if records is None:
         print("❌ No se encontró la tabla con class='items'")
         return pd.DataFrame()
 
-    tbody = table.find("tbody")
-    rows = tbody.find_all("tr")
-
-    records = []
-
-    for row in rows:
-        # Solo los <td> de primer nivel
-        tds = row.find_all("td", recursive=False)
-        if len(tds) < 6:
-            # Fila rara / separador
-            continue
-
-        # --- Temporada (td[0]) ---
-        season = tds[0].get_text(strip=True)
-
-        # --- Resultado (td[3]) ---
-        result_text = tds[3].get_text(" ", strip=True)
-        home_goals, away_goals = parse_score(result_text or "")
-
-        # --- Equipo local (td[1]) ---
-        home_cell = tds[1]
-        home_link = home_cell.find("a", href=True)
-        if home_link:
-            home_team = home_link.get_text(strip=True)
-            home_url = "https://www.transfermarkt.es" + home_link["href"]
-        else:
-            home_team = home_cell.get_text(" ", strip=True) or None
-            home_url = None
-
-        # --- Equipo visitante (último td: tds[-1]) ---
-        away_cell = tds[-1]
-        away_link = away_cell.find("a", href=True)
-        if away_link:
-            away_team = away_link.get_text(strip=True)
-            away_url = "https://www.transfermarkt.es" + away_link["href"]
-        else:
-            away_team = away_cell.get_text(" ", strip=True) or None
-            away_url = None
-
-        records.append({
-            "Season": season,
-            "HomeTeam": home_team,
-            "Result_raw": result_text,
+    # 3) Goles local/visitante a partir del resultado
+    finals = []
+    for r in records:
+        home_goals, away_goals = parse_score(r["Result_raw"] or "")
+        finals.append({
+            "Season": r["Season"],
+            "HomeTeam": r["HomeTeam"],
+            "Result_raw": r["Result_raw"],
             "HomeGoals": home_goals,
             "AwayGoals": away_goals,
-            "AwayTeam": away_team,
-            
+            "AwayTeam": r["AwayTeam"],
         })
 
-    df = pd.DataFrame(records)
+    df = pd.DataFrame(finals)
 
     # Limpiamos filas sin temporada o sin equipos
     df = df.dropna(subset=["Season", "HomeTeam", "AwayTeam"])
@@ -107,14 +69,16 @@ def scrape_cl_finals_transfermarkt():
 
 
 if __name__ == "__main__":
+    parse_scraper_args("Finales de la Champions (Transfermarkt)")
+
     print("📊 Scrapeando finales de la Champions (Transfermarkt)...")
 
-    os.makedirs("data", exist_ok=True)
+    os.makedirs("data/transfermarkt", exist_ok=True)
 
     df = scrape_cl_finals_transfermarkt()
 
     if not df.empty:
-        out = "data/tfmkt_champions_finals_alltime.csv"
+        out = "data/transfermarkt/tfmkt_champions_finals_alltime.csv"
         df.to_csv(out, index=False, encoding="utf-8-sig")
         print(f"\n✅ Archivo creado: {out}")
         print("   Registros:", df.shape[0])
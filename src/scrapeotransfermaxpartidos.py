@@ -1,116 +1,38 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 import os
+from scraping_utils import fetch, parse_scraper_args, to_int
+from tm_tables import parse_items_table, text, link, position, flag
 
 URL = "https://www.transfermarkt.es/uefa-champions-league/rekordspieler/pokalwettbewerb/CL"
 
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/124.0 Safari/537.36"
-    )
-}
-
-
-def to_int(text):
-    """Convierte texto a int o devuelve None si no se puede."""
-    text = (text or "").strip()
-    if text == "":
-        return None
-    # Por si viene con puntos como separador de miles: 15.758
-    text = text.replace(".", "").replace(",", "")
-    return int(text) if text.isdigit() else None
+# Columnas de la tabla (td de primer nivel)
+PLAYERS_COLUMNS = [
+    ("Rank", 0, text(to_int)),
+    ("Player", 1, link("title", xpath=".//a[@title]", default=text(sep=" "), strip=True)),
+    ("Player_url", 1, link("url", xpath=".//a[@title]")),
+    ("Position", 1, position),
+    ("Country", 2, flag),
+    ("Clubs_info", 3, text(none_if_empty=True)),   # ej. "3 Clubes" o nombre de club
+    ("Minutes", 4, text(to_int)),
+    ("Goals", 5, text(to_int)),
+    ("Matches", 6, text(to_int)),
+]
 
 
 def scrape_most_appearances_transfermarkt():
     print(f"🌍 Descargando jugadores con más partidos de Champions:\n{URL}")
 
     # 1) Descargar HTML
-    resp = requests.get(URL, headers=HEADERS, timeout=20)
+    resp = fetch(URL)
     print("   Status code:", resp.status_code)
     resp.raise_for_status()
 
-    # 2) Parsear con BeautifulSoup
-    soup = BeautifulSoup(resp.text, "lxml")
-
-    # 3) Localizar la tabla principal
-    table = soup.find("table", class_="items")
-    if table is None:
+    # 2) Extraer la tabla principal
+    records = parse_items_table(resp.text, PLAYERS_COLUMNS, min_cells=7)
+    if records is None:
         print("❌ No se encontró la tabla con class='items'")
         return pd.DataFrame()
 
-    tbody = table.find("tbody")
-    rows = tbody.find_all("tr")  # aquí no siempre hay odd/even, por si acaso
-
-    records = []
-
-    for row in rows:
-        # Saltar filas sin <td> de datos
-        tds = row.find_all("td", recursive=False)
-        if len(tds) < 7:
-            continue
-
-        # --- Rank ---
-        rank = to_int(tds[0].get_text(strip=True))
-
-        # --- Jugador + posición (tabla interna en la celda) ---
-        player_cell = tds[1]
-
-        name_tag = player_cell.find("a", title=True)
-        if name_tag:
-            player_name = name_tag["title"].strip()
-            player_url = "https://www.transfermarkt.es" + name_tag["href"]
-        else:
-            player_name = player_cell.get_text(" ", strip=True)
-            player_url = None
-
-        # Posición = segunda fila de la inline-table
-        position = None
-        inline_table = player_cell.find("table", class_="inline-table")
-        if inline_table:
-            inner_rows = inline_table.find_all("tr")
-            if len(inner_rows) >= 2:
-                pos_td = inner_rows[1].find("td")
-                if pos_td:
-                    position = pos_td.get_text(strip=True)
-
-        # --- País (bandera) ---
-        nationality = None
-        flag_img = tds[2].find("img")
-        if flag_img:
-            nationality = flag_img.get("title") or flag_img.get("alt")
-            if nationality:
-                nationality = nationality.strip()
-
-        # --- Club / nº de clubes (texto del <a>) ---
-        club_cell = tds[3]
-        club_text = club_cell.get_text(strip=True) or None
-
-        # --- Minutos jugados ---
-        minutes = to_int(tds[4].get_text(strip=True))
-
-        # --- Goles (texto del <a>) ---
-        goals_text = tds[5].get_text(strip=True)
-        goals = to_int(goals_text)
-
-        # --- Alineaciones (partidos) ---
-        matches_text = tds[6].get_text(strip=True)
-        matches = to_int(matches_text)
-
-        records.append({
-            "Rank": rank,
-            "Player": player_name,
-            "Player_url": player_url,
-            "Position": position,
-            "Country": nationality,
-            "Clubs_info": club_text,   # ej. "3 Clubes" o nombre de club
-            "Minutes": minutes,
-            "Goals": goals,
-            "Matches": matches,
-        })
-
     df = pd.DataFrame(records)
     df = df.dropna(subset=["Rank"]).sort_values("Rank").reset_index(drop=True)
 
@@ -118,14 +40,16 @@ def scrape_most_appearances_transfermarkt():
 
 
 if __name__ == "__main__":
+    parse_scraper_args("Jugadores con más partidos en la Champions (Transfermarkt)")
+
     print("📊 Scrapeando 'Most Appearances' de Transfermarkt...")
 
-    os.makedirs("data", exist_ok=True)
+    os.makedirs("data/transfermarkt", exist_ok=True)
 
     df = scrape_most_appearances_transfermarkt()
 
     if not df.empty:
-        out = "data/tfmkt_most_appearances_alltime.csv"
+        out = "data/transfermarkt/tfmkt_most_appearances_alltime.csv"
         df.to_csv(out, index=False, encoding="utf-8-sig")
         print(f"\n✅ Archivo creado: {out}")
         print(f"   Registros: {df.shape[0]}")
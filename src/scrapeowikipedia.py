@@ -1,10 +1,11 @@
-import requests
 import pandas as pd
-import time
 import re
 import warnings
 import os
 from io import StringIO  # para evitar el FutureWarning de read_html
+from scraping_utils import (
+    fetch, parse_scraper_args, selected_seasons, save_seasons_csv, mark_run, scrape_seasons,
+)
 
 warnings.filterwarnings(
     "ignore",
@@ -12,10 +13,6 @@ warnings.filterwarnings(
     message="The behavior of DataFrame concatenation with empty or all-NA entries is deprecated.*"
 )
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (compatible; ucl-research-bot/1.0)"
-}
-
 BASE_WIKI_URL = "https://en.wikipedia.org/wiki/"
 
 
@@ -149,6 +146,11 @@ def season_to_wiki_title(start_year: int) -> str:
     return title
 
 
+# Temporadas cuya descarga ha fallado en esta ejecución: si hay alguna, la
+# ejecución no se apunta y --since-last-run las vuelve a pedir
+FAILED_SEASONS = set()
+
+
 def scrape_season_matches(start_year: int) -> pd.DataFrame:
     """
     Scrapea la página de una temporada concreta de la Champions en Wikipedia.
@@ -157,12 +159,9 @@ def scrape_season_matches(start_year: int) -> pd.DataFrame:
     url = BASE_WIKI_URL + title
     print(f"  → Wikipedia: {url}")
 
-    try:
-        resp = requests.get(url, headers=HEADERS, timeout=20)
-        resp.raise_for_status()
-    except Exception as e:
-        print(f"    ⚠️ Error al descargar {url}: {e}")
-        return pd.DataFrame()
+    # Un error de descarga lo recoge scrape_seasons: la temporada queda como fallida
+    resp = fetch(url, season=start_year)
+    resp.raise_for_status()
 
     try:
         tables = pd.read_html(StringIO(resp.text))
@@ -212,21 +211,16 @@ def extract_season_year(season_str: str):
 
 
 if __name__ == "__main__":
-    # Temporadas desde 1992–93 hasta 2025–26 (start_year = 1992..2025)
-    START_YEARS = list(range(1992, 2026))
+    args = parse_scraper_args("Partidos de la Champions por temporada (Wikipedia)", seasons=True)
 
-    all_seasons = []
+    # Por defecto, desde 1992–93 hasta la temporada actual (start_year = 1992..)
+    START_YEARS, incremental = selected_seasons(args, "scrapeowikipedia")
 
     print("📊 Scrapeando partidos de Champions en Wikipedia...")
 
-    os.makedirs("data", exist_ok=True)
+    os.makedirs("data/uefa", exist_ok=True)
 
-    for y in START_YEARS:
-        print(f"\n Temporada {y}/{y+1}")
-        df_season = scrape_season_matches(y)
-        if not df_season.empty:
-            all_seasons.append(df_season)
-        time.sleep(1)
+    all_seasons = scrape_seasons(scrape_season_matches, START_YEARS, failed=FAILED_SEASONS)
 
     if all_seasons:
         matches = pd.concat(all_seasons, ignore_index=True)
@@ -267,8 +261,10 @@ if __name__ == "__main__":
         other_cols = [c for c in matches.columns if c not in base_cols]
         matches = matches[base_cols + other_cols]
 
-        out_file = "data/ucl_matches_wikipedia_final.csv"
-        matches.to_csv(out_file, index=False)
+        out_file = "data/uefa/ucl_matches_wikipedia_final.csv"
+        matches = save_seasons_csv(out_file, matches, "Season_year", incremental,
+                                   failed=FAILED_SEASONS)
+        mark_run("scrapeowikipedia", FAILED_SEASONS)
         print(f"\n✅ CSV de partidos guardado en: {out_file}")
         print(f"   Nº filas: {matches.shape[0]}, Nº columnas: {matches.shape[1]}")
     else:
@@ -1,243 +1,156 @@
-import requests
-import pandas as pd
-import time
-import warnings
-
-# Opcional: ocultar el FutureWarning de pandas sobre concat
-warnings.filterwarnings(
-    "ignore",
-    category=FutureWarning,
-    message="The behavior of DataFrame concatenation with empty or all-NA entries is deprecated.*"
-)
+from compstats import Ranking, TEAM_COLUMNS, team_row
+from scraping_utils import safe_num
 
 BASE_URL_PLAYERS = "https://compstats.uefa.com/v1/player-ranking"
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (compatible; ucl-research-bot/1.0)"
-}
-
-
-def safe_num(x):
-    """Convierte a float o devuelve None si no se puede (sirve para enteros y decimales)."""
-    try:
-        return float(x)
-    except (TypeError, ValueError):
-        return None
-
-
-def scrape_stats_group(season_year: int, stats_list, group_name: str,
-                       limit: int = 200, offset: int = 0) -> pd.DataFrame:
-    """
-    Descarga estadísticas de JUGADORES para una temporada y un grupo de stats.
-    Devuelve un DataFrame con info de equipo + jugador + stats del grupo.
-    """
-    params = {
-        "competitionId": "1",             # UCL
-        "limit": str(limit),
-        "offset": str(offset),
-        "optionalFields": "PLAYER,TEAM",
-        "order": "DESC",
-        "phase": "TOURNAMENT",
-        "seasonYear": str(season_year),
-        "stats": ",".join(stats_list),
+# Columnas de contexto, siempre delante de las stats
+BASE_COLUMNS = TEAM_COLUMNS + [
+    # Jugador - identificadores
+    "player_id",
+    "player_name",
+
+    # Jugador - características
+    "player_age",
+    "player_birth_date",
+    "player_country_code",
+    "player_birth_country_code",
+    "player_gender",
+    "player_field_position",
+    "player_detailed_field_position",
+
+    # Club
+    "club_id",
+    "club_shirt_name",
+    "club_jersey_number",
+]
+
+# Identificadores que en la tabla ancha se guardan como enteros
+ID_COLUMNS = ["season_year", "team_id", "player_id", "club_id"]
+
+# Columnas de contexto numéricas (no identificadores)
+NUMERIC_COLUMNS = ["player_age"]
+
+
+def player_id(entry: dict):
+    return (entry.get("player", {}) or {}).get("id")
+
+
+def player_row(entry: dict, season_year: int) -> dict:
+    """Columnas de contexto (temporada, equipo, jugador) de una entrada del ranking."""
+    player = entry.get("player", {}) or {}
+
+    return {
+        # Contexto temporada y equipo
+        **team_row(entry, season_year),
+
+        # Jugador - identificadores
+        "player_id": player.get("id"),
+        "player_name": player.get("internationalName"),
+
+        # Jugador - características
+        "player_age": safe_num(player.get("age")),
+        "player_birth_date": player.get("birthDate"),
+        "player_country_code": player.get("countryCode"),
+        "player_birth_country_code": player.get("countryOfBirthCode"),
+        "player_gender": player.get("gender"),
+        "player_field_position": player.get("fieldPosition"),
+        "player_detailed_field_position": player.get("detailedFieldPosition"),
+
+        # Club
+        "club_id": player.get("clubId"),
+        "club_shirt_name": player.get("clubShirtName"),
+        "club_jersey_number": player.get("clubJerseyNumber"),
     }
 
-    r = requests.get(BASE_URL_PLAYERS, params=params, headers=HEADERS, timeout=15)
-    r.raise_for_status()
-    data = r.json()
-
-    rows = []
-    for entry in data:
-        # ---- Equipo ----
-        team = entry.get("team", {}) or {}
-        translations = team.get("translations", {}) or {}
-        display_name = translations.get("displayName", {}) or {}
-        country_name = translations.get("countryName", {}) or {}
-
-        # ---- Jugador ----
-        player = entry.get("player", {}) or {}
-
-        row = {
-            # Contexto temporada
-            "season_year": season_year,
-
-            # Equipo
-            "team_id": entry.get("teamId"),
-            "team_code": team.get("teamCode"),
-            "team_name_en": display_name.get("EN"),
-            "team_name_es": display_name.get("ES"),
-            "country_en": country_name.get("EN"),
-            "country_es": country_name.get("ES"),
 
-            # Jugador - identificadores
-            "player_id": player.get("id"),
-            "player_name": player.get("internationalName"),
-
-            # Jugador - características
-            "player_age": safe_num(player.get("age")),
-            "player_birth_date": player.get("birthDate"),
-            "player_country_code": player.get("countryCode"),
-            "player_birth_country_code": player.get("countryOfBirthCode"),
-            "player_gender": player.get("gender"),
-            "player_field_position": player.get("fieldPosition"),
-            "player_detailed_field_position": player.get("detailedFieldPosition"),
-
-            # Club
-            "club_id": player.get("clubId"),
-            "club_shirt_name": player.get("clubShirtName"),
-            "club_jersey_number": player.get("clubJerseyNumber"),
-        }
-
-        # ---- Estadísticas del grupo ----
-        stats_list_resp = entry.get("statistics", []) or []
-        stats_dict = {s.get("name"): s.get("value") for s in stats_list_resp}
-
-        for stat in stats_list:
-            row[f"{group_name}__{stat}"] = safe_num(stats_dict.get(stat))
+# 📌 Stats por pestaña que quieres scrapear (tal y como las llama la API)
+STAT_GROUPS = {
+    "key": [
+        "minutes_played_official",
+        "matches_appearance",
+        "goals",
+        "assists",
+        "distance_covered",
+        "top_speed",
+    ],
+    "goals": [
+        "goals",
+        "goals_scored_with_right",
+        "goals_scored_with_left",
+        "goals_scored_head",
+        "goals_scored_other",
+        "goals_scored_inside_penalty_area",
+        "goals_scored_outside_penalty_area",
+        "penalty_scored",
+        "matches_appearance",
+    ],
+    "attempts": [
+        "attempts",
+        "attempts_on_target",
+        "attempts_off_target",
+        "attempts_blocked",
+        "matches_appearance",
+    ],
+    "distribution": [
+        "passes_accuracy",
+        "passes_attempted",
+        "passes_completed",
+        "cross_accuracy",
+        "cross_attempted",
+        "cross_completed",
+        "free_kick",
+        "matches_appearance",
+    ],
+    "attacking": [
+        "assists",
+        "corners",
+        "offsides",
+        "dribbling",
+        "matches_appearance",
+    ],
+    "defending": [
+        "recovered_ball",
+        "tackles",
+        "tackles_won",
+        "tackles_lost",
+        "clearance_attempted",
+        "matches_appearance",
+    ],
+    "goalkeeping": [
+        "saves",
+        "goals_conceded",
+        "saves_on_penalty",
+        "clean_sheet",
+        "punches",
+        "matches_appearance",
+    ],
+    "disciplinary": [
+        "fouls_committed",
+        "fouls_suffered",
+        "yellow_cards",
+        "red_cards",
+        "minutes_played_official",
+        "matches_appearance",
+    ],
+}
 
-        rows.append(row)
 
-    return pd.DataFrame(rows)
+PLAYERS = Ranking(
+    name="scraperjugador",
+    description="Estadísticas de jugadores de la Champions (compstats UEFA)",
+    url=BASE_URL_PLAYERS,
+    optional_fields="PLAYER,TEAM",
+    row=player_row,
+    entry_key=player_id,
+    base_columns=BASE_COLUMNS,
+    id_columns=ID_COLUMNS,
+    numeric_columns=NUMERIC_COLUMNS,
+    stat_groups=STAT_GROUPS,
+    file_prefix="players",
+    # Una temporada ronda los 800 jugadores: todas las páginas del ranking
+    paginated=True,
+)
 
 
 if __name__ == "__main__":
-    # 📌 Stats por pestaña que quieres scrapear (tal y como las llama la API)
-    STAT_GROUPS = {
-        "key": [
-            "minutes_played_official",
-            "matches_appearance",
-            "goals",
-            "assists",
-            "distance_covered",
-            "top_speed",
-        ],
-        "goals": [
-            "goals",
-            "goals_scored_with_right",
-            "goals_scored_with_left",
-            "goals_scored_head",
-            "goals_scored_other",
-            "goals_scored_inside_penalty_area",
-            "goals_scored_outside_penalty_area",
-            "penalty_scored",
-            "matches_appearance",
-        ],
-        "attempts": [
-            "attempts",
-            "attempts_on_target",
-            "attempts_off_target",
-            "attempts_blocked",
-            "matches_appearance",
-        ],
-        "distribution": [
-            "passes_accuracy",
-            "passes_attempted",
-            "passes_completed",
-            "cross_accuracy",
-            "cross_attempted",
-            "cross_completed",
-            "free_kick",
-            "matches_appearance",
-        ],
-        "attacking": [
-            "assists",
-            "corners",
-            "offsides",
-            "dribbling",
-            "matches_appearance",
-        ],
-        "defending": [
-            "recovered_ball",
-            "tackles",
-            "tackles_won",
-            "tackles_lost",
-            "clearance_attempted",
-            "matches_appearance",
-        ],
-        "goalkeeping": [
-            "saves",
-            "goals_conceded",
-            "saves_on_penalty",
-            "clean_sheet",
-            "punches",
-            "matches_appearance",
-        ],
-        "disciplinary": [
-            "fouls_committed",
-            "fouls_suffered",
-            "yellow_cards",
-            "red_cards",
-            "minutes_played_official",
-            "matches_appearance",
-        ],
-    }
-
-    for group_name, stats_list in STAT_GROUPS.items():
-        print(f"\n📊 Extrayendo estadísticas: {group_name}")
-        all_dfs = []
-
-        for season in range(1992, 2026):
-            print(f"  ➤ Temporada {season}/{season+1}…")
-            try:
-                df_season = scrape_stats_group(season, stats_list, group_name)
-                if not df_season.empty:
-                    all_dfs.append(df_season)
-            except Exception as e:
-                print(f"    ⚠️ Error en temporada {season}: {e}")
-            time.sleep(1)  # para no freír el endpoint
-
-        # Filtramos DF vacíos y DF con todas las celdas a NaN
-        all_dfs = [
-            df for df in all_dfs
-            if not df.empty and not df.isna().all().all()
-        ]
-
-        if all_dfs:
-            final_df = pd.concat(all_dfs, ignore_index=True)
-
-            # 👉 De momento NO borramos columnas vacías,
-            # para asegurarnos de que no perdemos stats como top_speed o distance_covered.
-            # Si luego quieres limpiar, puedes descomentar esto:
-            # final_df = final_df.dropna(axis=1, how="all")
-
-            # Ordenamos las columnas para que los datos básicos siempre estén delante
-            col_order = [
-                # Contexto temporada
-                "season_year",
-
-                # Equipo
-                "team_id",
-                "team_code",
-                "team_name_en",
-                "team_name_es",
-                "country_en",
-                "country_es",
-
-                # Jugador - identificadores
-                "player_id",
-                "player_name",
-
-                # Jugador - características
-                "player_age",
-                "player_birth_date",
-                "player_country_code",
-                "player_birth_country_code",
-                "player_gender",
-                "player_field_position",
-                "player_detailed_field_position",
-
-                # Club
-                "club_id",
-                "club_shirt_name",
-                "club_jersey_number",
-            ]
-
-            base_cols = [c for c in col_order if c in final_df.columns]
-            other_cols = [c for c in final_df.columns if c not in base_cols]
-            final_df = final_df[base_cols + other_cols]
-
-            file_name = f"data/ucl_players_{group_name}_stats_1992_2025.csv"
-            final_df.to_csv(file_name, index=False)
-            print(f"📁 Guardado correctamente: {file_name}")
-        else:
-            print(f"❌ No se han generado datos para {group_name}.")
+    PLAYERS.main()
@@ -0,0 +1,502 @@
+import argparse
+import datetime
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib.parse import urlencode, urlsplit
+from urllib3.util.retry import Retry
+
+# User-Agent por host: Transfermarkt bloquea lo que no parece un navegador
+HEADERS_BOT = {
+    "User-Agent": "Mozilla/5.0 (compatible; ucl-research-bot/1.0)"
+}
+
+HEADERS_BROWSER = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/124.0 Safari/537.36"
+    )
+}
+
+HOST_HEADERS = {
+    "www.transfermarkt.es": HEADERS_BROWSER,
+}
+
+DEFAULT_TIMEOUT = 20
+
+# Conexiones keep-alive abiertas como mucho por host
+MAX_CONNECTIONS_PER_HOST = 4
+
+# Peticiones por segundo (y ráfaga) permitidas por host
+HOST_RATES = {
+    "www.transfermarkt.es": (2.0, 2),
+    "compstats.uefa.com": (5.0, 5),
+    "en.wikipedia.org": (2.0, 2),
+}
+DEFAULT_RATE = (1.0, 1)
+
+# Hilos por defecto de run_jobs
+MAX_WORKERS = 8
+
+# Caché en disco de respuestas HTTP (una entrada .json + .body por petición)
+HTTP_CACHE_DIR = os.environ.get("UCL_HTTP_CACHE", os.path.join("data", "http_cache"))
+
+# Con --offline solo se sirve desde la caché: nunca se sale a la red
+OFFLINE = False
+
+# Servidor local que hace de Transfermarkt/Wikipedia/UEFA (bench/fixture_server.py):
+# https://host/ruta se pide como UPSTREAM/host/ruta. Vacío = hosts reales
+UPSTREAM = os.environ.get("UCL_HTTP_UPSTREAM", "")
+
+# Primera temporada de la Champions (92/93) y registro de la última ejecución
+# de cada scraper, para el modo --since-last-run
+FIRST_SEASON = 1992
+STATE_PATH = os.path.join("data", "scrape_state.json")
+
+_session = None
+
+
+def get_session() -> requests.Session:
+    """
+    Sesión HTTP compartida por todos los scrapers: reutiliza conexiones
+    TCP/TLS por host, pide gzip y aplica la misma política de reintentos.
+    """
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=3,
+            backoff_factor=1.0,                       # 1s, 2s, 4s…
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+            respect_retry_after_header=True,
+            raise_on_status=False,                    # el scraper decide qué hacer con el status
+        )
+        adapter = HTTPAdapter(
+            pool_connections=8,                       # hosts distintos con pool propio
+            pool_maxsize=MAX_CONNECTIONS_PER_HOST,
+            pool_block=True,                          # no abrir más conexiones que el límite
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        _session = session
+    return _session
+
+
+class TokenBucket:
+    """
+    Limitador token-bucket: `rate` peticiones/segundo de media con ráfagas
+    de hasta `burst`. Thread-safe; cada llamada a acquire() reserva su turno
+    y duerme fuera del lock lo que le toque esperar.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(host: str) -> TokenBucket:
+    with _buckets_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(*HOST_RATES.get(host, DEFAULT_RATE))
+        return _buckets[host]
+
+
+def set_rate_limit(host: str, rate: float, burst: int = 1):
+    """Cambia el ritmo permitido para un host (p. ej. para ser más conservador)."""
+    with _buckets_lock:
+        HOST_RATES[host] = (rate, burst)
+        _buckets[host] = TokenBucket(rate, burst)
+
+
+class OfflineCacheMiss(requests.RequestException):
+    """En modo --offline se ha pedido una URL que no está en la caché."""
+
+
+def set_offline(offline: bool = True):
+    global OFFLINE
+    OFFLINE = offline
+
+
+def current_season_year(today: datetime.date = None) -> int:
+    """Año de inicio de la temporada en curso (la Champions arranca en julio)."""
+    today = today or datetime.date.today()
+    return today.year if today.month >= 7 else today.year - 1
+
+
+def is_closed_season(season_year: int) -> bool:
+    """Una temporada ya terminada no cambia."""
+    return season_year < current_season_year()
+
+
+def fetched_after_season(meta: dict, season_year: int) -> bool:
+    """
+    La copia en caché se descargó cuando la temporada ya había terminado, así
+    que vale para siempre. Una guardada a mitad de temporada (p. ej. en mayo)
+    no: le faltan las últimas jornadas y hay que revalidarla.
+    """
+    fetched_at = meta.get("fetched_at")
+    if fetched_at is None:
+        return False
+    return current_season_year(datetime.date.fromtimestamp(fetched_at)) > season_year
+
+
+def cache_key(url: str, params=None) -> str:
+    # Misma URL + mismos parámetros (en cualquier orden) -> misma entrada
+    query = urlencode(sorted((params or {}).items()))
+    return hashlib.sha1(f"GET {url}?{query}".encode("utf-8")).hexdigest()
+
+
+def cache_paths(key: str, cache_dir: str = None):
+    base = os.path.join(cache_dir or HTTP_CACHE_DIR, key[:2], key)
+    return base + ".json", base + ".body"
+
+
+def read_cache(key: str, cache_dir: str = None):
+    """(meta, body) de la entrada cacheada, o None si no existe."""
+    meta_path, body_path = cache_paths(key, cache_dir)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None
+    # Entrada a medio escribir o corrupta: se trata como ausente
+    if hashlib.sha1(body).hexdigest() != meta.get("sha1"):
+        return None
+    return meta, body
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_cache(key: str, resp: requests.Response):
+    meta_path, body_path = cache_paths(key)
+    os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+    body = resp.content
+    meta = {
+        "url": resp.url,
+        "status": resp.status_code,
+        "headers": {
+            k: v for k, v in resp.headers.items()
+            if k.lower() in ("content-type", "etag", "last-modified")
+        },
+        "sha1": hashlib.sha1(body).hexdigest(),
+        "fetched_at": time.time(),
+    }
+    # Primero el cuerpo: el .json solo apunta a cuerpos completos
+    _write_atomic(body_path, body)
+    _write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+
+def touch_cache(key: str, meta: dict):
+    """Un 304 confirma la copia: se apunta como descargada ahora."""
+    meta_path, _ = cache_paths(key)
+    meta = {**meta, "fetched_at": time.time()}
+    _write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+
+def cached_response(meta: dict, body: bytes) -> requests.Response:
+    """Reconstruye un Response equivalente al original (.text, .json(), status…)."""
+    resp = requests.Response()
+    resp.status_code = meta["status"]
+    resp.headers = CaseInsensitiveDict(meta["headers"])
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.url = meta["url"]
+    resp._content = body
+    resp.from_cache = True
+    return resp
+
+
+def upstream_url(url: str) -> str:
+    """URL a la que se envía realmente la petición (ver UPSTREAM)."""
+    if not UPSTREAM:
+        return url
+    parts = urlsplit(url)
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{UPSTREAM.rstrip('/')}/{parts.netloc}{parts.path}{query}"
+
+
+def fetch(url: str, params=None, timeout: int = DEFAULT_TIMEOUT,
+          season: int = None) -> requests.Response:
+    """
+    GET a través de la sesión compartida, con las cabeceras del host y
+    esperando turno en su limitador (sustituye a los time.sleep fijos).
+
+    Las respuestas 200 se guardan en HTTP_CACHE_DIR. Si `season` es una
+    temporada cerrada y la copia en caché se descargó después de que
+    terminara, se usa sin tocar la red; si no, se revalida con
+    ETag/Last-Modified (un 304 reutiliza el cuerpo guardado).
+    En modo offline solo se sirve desde caché. Con UCL_HTTP_UPSTREAM la
+    petición va al servidor local de fixtures en vez de al host real.
+    """
+    key = cache_key(url, params)
+    cached = read_cache(key)
+
+    if cached and (OFFLINE or (season is not None and is_closed_season(season)
+                               and fetched_after_season(cached[0], season))):
+        return cached_response(*cached)
+    if OFFLINE:
+        raise OfflineCacheMiss(f"Sin copia en caché (modo offline): {url} {params or ''}")
+
+    host = urlsplit(url).hostname
+    headers = dict(HOST_HEADERS.get(host, HEADERS_BOT))
+    if cached:
+        validators = CaseInsensitiveDict(cached[0]["headers"])
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last-modified" in validators:
+            headers["If-Modified-Since"] = validators["last-modified"]
+
+    get_bucket(host).acquire()
+    resp = get_session().get(upstream_url(url), params=params, headers=headers, timeout=timeout)
+
+    if resp.status_code == 304 and cached:
+        touch_cache(key, cached[0])
+        return cached_response(*cached)
+    if resp.status_code == 200:
+        write_cache(key, resp)
+    resp.from_cache = False
+    return resp
+
+
+def scraper_arg_parser(description: str, seasons: bool = False) -> argparse.ArgumentParser:
+    """
+    Parser con los argumentos comunes de los scrapers (--offline). Con
+    seasons=True añade además la selección de temporadas a refrescar.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--offline", action="store_true",
+                        help="Usar solo respuestas en caché, sin red (para re-parsear en segundos)")
+    if seasons:
+        parser.add_argument("--from-season", type=int, default=None,
+                            help="Primera temporada a refrescar (año de inicio, p. ej. 2025 = 25/26)")
+        parser.add_argument("--to-season", type=int, default=None,
+                            help="Última temporada a refrescar (por defecto, la actual)")
+        parser.add_argument("--since-last-run", action="store_true",
+                            help="Solo las temporadas que seguían abiertas en la última ejecución")
+    return parser
+
+
+def apply_scraper_args(parser: argparse.ArgumentParser) -> argparse.Namespace:
+    """Parsea la línea de comandos y aplica las opciones globales (--offline)."""
+    args = parser.parse_args()
+    set_offline(args.offline)
+    return args
+
+
+def parse_scraper_args(description: str, seasons: bool = False) -> argparse.Namespace:
+    return apply_scraper_args(scraper_arg_parser(description, seasons=seasons))
+
+
+def load_state() -> dict:
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def mark_run(name: str, failed=()):
+    """
+    Apunta la fecha de esta ejecución del scraper `name` (para --since-last-run).
+    No se apunta si ha fallado alguna temporada (`failed`), para que la
+    siguiente ejecución las vuelva a pedir, ni en modo offline, que no ha
+    descargado nada nuevo.
+    """
+    if failed:
+        seasons = ", ".join(str(season) for season in sorted(failed))
+        print(f"\n⚠️ Temporadas con errores: {seasons}. No se apunta la ejecución: "
+              f"--since-last-run las volverá a descargar.")
+        return
+    if OFFLINE:
+        print("ℹ️ Modo offline: no se apunta la ejecución.")
+        return
+    state = load_state()
+    state[name] = {"last_run": datetime.date.today().isoformat()}
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    _write_atomic(STATE_PATH, json.dumps(state, indent=2).encode("utf-8"))
+
+
+def selected_seasons(args: argparse.Namespace, name: str):
+    """
+    (temporadas, incremental). Sin flags: todas, de FIRST_SEASON a la actual,
+    y el CSV se reescribe entero. Con --from-season/--to-season o
+    --since-last-run solo esas temporadas, que luego se fusionan con el CSV
+    existente (ver save_seasons_csv).
+    """
+    current = current_season_year()
+    start, end = args.from_season, args.to_season or current
+
+    if args.since_last_run:
+        last_run = load_state().get(name, {}).get("last_run")
+        if last_run is None:
+            print(f"ℹ️ {name} no tiene ejecuciones previas: se descargan todas las temporadas")
+            return list(range(FIRST_SEASON, current + 1)), False
+        start = current_season_year(datetime.date.fromisoformat(last_run))
+
+    if start is None and args.to_season is None:
+        return list(range(FIRST_SEASON, current + 1)), False
+    return list(range(start or FIRST_SEASON, end + 1)), True
+
+
+def upsert_seasons_csv(path: str, df: pd.DataFrame, season_col: str,
+                       encoding: str = "utf-8") -> pd.DataFrame:
+    """
+    Fusiona df en el CSV `path` usando la temporada como clave: las
+    temporadas que trae df sustituyen por completo a las del fichero (así
+    también desaparecen filas que ya no existen) y el resto se conserva tal
+    cual. Todo se trata como texto, de modo que las filas históricas se
+    reescriben byte a byte igual que estaban.
+    """
+    # Los valores nuevos con el mismo formato que les daría to_csv
+    new = pd.read_csv(io.StringIO(df.to_csv(index=False)), dtype=str, keep_default_na=False)
+
+    if os.path.exists(path):
+        old = pd.read_csv(path, dtype=str, keep_default_na=False, encoding=encoding)
+        old = old[~old[season_col].isin(set(new[season_col]))]
+        merged = pd.concat([old, new], ignore_index=True).fillna("")
+        merged = merged.sort_values(
+            season_col, key=lambda s: pd.to_numeric(s, errors="coerce"), kind="stable"
+        )
+    else:
+        print(f"   ⚠️ {path} no existía: solo contendrá las temporadas descargadas")
+        merged = new
+
+    merged.to_csv(path, index=False, encoding=encoding)
+    return merged
+
+
+def save_seasons_csv(path: str, df: pd.DataFrame, season_col: str,
+                     incremental: bool, encoding: str = "utf-8", failed=()) -> pd.DataFrame:
+    """
+    Reescribe el CSV (ejecución completa) o fusiona las temporadas nuevas.
+    Las temporadas de `failed` no se tocan: se conservan las filas guardadas,
+    aunque la ejecución sea completa.
+    """
+    if failed:
+        df = df[~df[season_col].isin(set(failed))]
+        incremental = True
+    if incremental:
+        return upsert_seasons_csv(path, df, season_col, encoding=encoding)
+    df.to_csv(path, index=False, encoding=encoding)
+    return df
+
+
+def run_jobs(fn, jobs, max_workers: int = MAX_WORKERS) -> list:
+    """
+    Ejecuta fn(job) para cada job en un pool de hilos y devuelve los
+    resultados en el mismo orden que `jobs`. El ritmo de peticiones lo
+    marca el limitador de cada host, no el nº de hilos.
+    """
+    jobs = list(jobs)
+    if max_workers <= 1 or len(jobs) <= 1:
+        return [fn(job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        return list(pool.map(fn, jobs))
+
+
+def scrape_seasons(scrape_season, seasons, failed: set = None) -> list:
+    """
+    scrape_season(año) para cada temporada, en paralelo y en orden. Una
+    temporada que falla se avisa, se apunta en `failed` y se omite, así no
+    se fusiona en el CSV y sus filas anteriores se conservan. Devuelve los
+    DataFrames no vacíos.
+    """
+    def scrape_year(year):
+        try:
+            return scrape_season(year)
+        except Exception as e:
+            print(f"   ❗ Error en temporada {season_label_from_year(year)}: {e}")
+            if failed is not None:
+                failed.add(year)
+            return pd.DataFrame()
+
+    # El limitador por host de fetch() marca el ritmo
+    return [df for df in run_jobs(scrape_year, seasons) if not df.empty]
+
+
+def to_int(text):
+    """Convierte '12' o '1.234' -> int, None si no puede."""
+    text = (text or "").strip()
+    if text == "":
+        return None
+    # separadores de miles y espacios (también el no separable)
+    text = text.replace(".", "").replace(",", "").replace(" ", "").replace("\xa0", "")
+    return int(text) if text.isdigit() else None
+
+
+def to_int_signed(text):
+    """Convierte texto como 1.234, +56, -12 en int o None."""
+    text = (text or "").strip()
+    if text == "":
+        return None
+
+    # quitar separadores de miles
+    text = text.replace(".", "").replace(" ", "")
+
+    # signo
+    sign = 1
+    if text[0] in "+-":
+        if text[0] == "-":
+            sign = -1
+        text = text[1:]
+
+    if not text.isdigit():
+        return None
+
+    return sign * int(text)
+
+
+def safe_num(x):
+    """Convierte a float o devuelve None si no se puede (sirve para enteros y decimales)."""
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return None
+
+
+def season_label_from_year(year: int) -> str:
+    """
+    1992 -> '92/93'
+    1999 -> '99/00'
+    2000 -> '00/01'
+    2025 -> '25/26'
+    """
+    a = year % 100
+    b = (year + 1) % 100
+    return f"{a:02d}/{b:02d}"
@@ -0,0 +1,274 @@
+import lxml.html
+import pandas as pd
+from lxml import etree
+from scraping_utils import fetch, run_jobs, season_label_from_year
+
+# Extracción de las tablas `table.items` de Transfermarkt directamente sobre
+# un árbol lxml (XPath compilado), sin construir un árbol BeautifulSoup.
+#
+# Cada tipo de página declara sus columnas como una lista de
+#   (nombre_columna, índice_td, extractor)
+# donde el extractor recibe el <td> de primer nivel y devuelve el valor ya
+# tipado. Los extractores reproducen la semántica de los antiguos bucles con
+# BeautifulSoup (get_text(strip=True), find("a", href=True), etc.).
+
+TM_BASE = "https://www.transfermarkt.es"
+
+# Páginas de una misma temporada que se descargan a la vez
+PAGE_WORKERS = 4
+
+
+class PageUnavailable(Exception):
+    """Una página de la temporada no ha llegado (status != 200 tras los reintentos)."""
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_ITEMS_TABLE = etree.XPath(f"//table[{_has_class('items')}]")
+_TBODY = etree.XPath(".//tbody")
+_ALL_ROWS = etree.XPath(".//tr")
+_CELLS = etree.XPath("./td")
+# Como BeautifulSoup: sin comentarios ni el contenido de <script>/<style>
+_TEXT = etree.XPath(".//text()[not(ancestor::script) and not(ancestor::style)]")
+_INLINE_TABLE = etree.XPath(f".//table[{_has_class('inline-table')}]")
+_IMGS = etree.XPath(".//img")
+
+
+def parse_html(html: str):
+    return lxml.html.document_fromstring(html)
+
+
+def cell_text(el, sep: str = "") -> str:
+    """Equivalente a get_text(sep, strip=True) de BeautifulSoup."""
+    return sep.join(s for s in (t.strip() for t in _TEXT(el)) if s)
+
+
+def find_items_table(tree):
+    """Primera `table.items` de la página, o None."""
+    tables = _ITEMS_TABLE(tree)
+    return tables[0] if tables else None
+
+
+def table_rows(table, row_classes=None) -> list:
+    """Filas del primer <tbody> (opcionalmente solo las de ciertas clases, p. ej. odd/even)."""
+    tbodies = _TBODY(table)
+    if not tbodies:
+        return []
+    rows = _ALL_ROWS(tbodies[0])
+    if row_classes:
+        wanted = set(row_classes)
+        rows = [r for r in rows if wanted.intersection((r.get("class") or "").split())]
+    return rows
+
+
+def extract_records(rows, columns, min_cells: int) -> list:
+    """
+    Un dict por fila con al menos `min_cells` celdas de primer nivel,
+    con las columnas en el orden de la especificación.
+    """
+    records = []
+    for row in rows:
+        tds = _CELLS(row)
+        if len(tds) < min_cells:
+            continue
+        records.append({name: extract(tds[idx]) for name, idx, extract in columns})
+    return records
+
+
+def parse_items_table(html: str, columns, min_cells: int, row_classes=None):
+    """Registros de la tabla `items` de una página; None si la página no la tiene."""
+    table = find_items_table(parse_html(html))
+    if table is None:
+        return None
+    return extract_records(table_rows(table, row_classes), columns, min_cells)
+
+
+# ---------------------------------------------------------------------------
+# Extractores de celda
+# ---------------------------------------------------------------------------
+
+def text(convert=None, sep: str = "", none_if_empty: bool = False):
+    """Texto de la celda, opcionalmente convertido (to_int, ...) o None si está vacío."""
+    def extract(td):
+        value = cell_text(td, sep)
+        if none_if_empty and not value:
+            return None
+        return convert(value) if convert else value
+    return extract
+
+
+def link(field: str = "text", xpath: str = ".//a[@href]", default=None, strip: bool = False):
+    """
+    Dato del primer enlace de la celda que cumpla `xpath`:
+      text           -> texto del enlace
+      title          -> atributo title
+      title_or_text  -> title si lo tiene, si no el texto
+      url            -> TM_BASE + href
+    Sin enlace se usa el extractor `default` (o None).
+    """
+    find = etree.XPath(xpath)
+
+    def extract(td):
+        found = find(td)
+        if not found:
+            return default(td) if default else None
+        a = found[0]
+        if field == "url":
+            return TM_BASE + a.get("href", "")
+        if field == "title":
+            value = a.get("title")
+        elif field == "title_or_text":
+            value = a.get("title") or cell_text(a)
+        else:
+            value = cell_text(a)
+        return value.strip() if strip else value
+    return extract
+
+
+def position(td):
+    """Posición del jugador: segunda fila de la inline-table de la celda."""
+    inline = _INLINE_TABLE(td)
+    if not inline:
+        return None
+    sub_rows = _ALL_ROWS(inline[0])
+    if len(sub_rows) < 2:
+        return None
+    pos_tds = sub_rows[1].xpath(".//td")
+    return cell_text(pos_tds[0]) if pos_tds else None
+
+
+def flags(td):
+    """Títulos de todas las banderas, separados por comas (None si no hay)."""
+    titles = [img.get("title") for img in _IMGS(td) if img.get("title")]
+    return ", ".join(titles) if titles else None
+
+
+def flag(td):
+    """Title (o alt) de la primera bandera."""
+    imgs = _IMGS(td)
+    if not imgs:
+        return None
+    value = imgs[0].get("title") or imgs[0].get("alt")
+    return value.strip() if value else value
+
+
+# ---------------------------------------------------------------------------
+# Paginación
+# ---------------------------------------------------------------------------
+
+_TM_PAGINATION = etree.XPath(f"//ul[{_has_class('tm-pagination')}]")
+_ANY_PAGINATION = etree.XPath("//ul[contains(@class, 'pagination')] | //div[contains(@class, 'pagination')]")
+_LINKS = etree.XPath(".//a")
+
+
+def last_page_number(tree, loose: bool = False):
+    """
+    Mayor número de página que enlaza el paginador `ul.tm-pagination`
+    (con loose=True, si no lo hay, cualquier ul/div con 'pagination' en la
+    clase). None si la página no tiene paginador.
+    """
+    candidates = _TM_PAGINATION(tree)[:1]
+    if not candidates and loose:
+        candidates = _ANY_PAGINATION(tree)
+    if not candidates:
+        return None
+
+    last_page = 1
+    for pag in candidates:
+        for a in _LINKS(pag):
+            txt = cell_text(a)
+            if txt.isdigit():
+                last_page = max(last_page, int(txt))
+    return last_page
+
+
+# ---------------------------------------------------------------------------
+# Listados paginados por temporada (goleadores, goles + asistencias…)
+# ---------------------------------------------------------------------------
+
+def fetch_page(page_url, season_id: int, page: int):
+    """
+    Árbol lxml de una página de la temporada. Si no llega se lanza
+    PageUnavailable: una temporada a medias no debe sustituir a la guardada.
+    """
+    url = page_url(season_id, page)
+    print(f"   ▶ Page {page}: {url}")
+    resp = fetch(url, season=season_id)
+    if resp.status_code != 200:
+        print(f"      ⚠️ Página {page} no disponible (status {resp.status_code})")
+        raise PageUnavailable(f"página {page} no disponible (status {resp.status_code}): {url}")
+    return parse_html(resp.text)
+
+
+def get_last_page(tree, season_id: int, loose: bool = False) -> int:
+    """Última página de la paginación, detectada en la primera (ya descargada)."""
+    last_page = last_page_number(tree, loose=loose)
+    if last_page is None:
+        print("   ℹ️ No hay paginador: asumimos 1 página.")
+        return 1
+
+    print(f"   ℹ️ Última página detectada para saison_id={season_id}: {last_page}")
+    return last_page
+
+
+def parse_page(tree, columns, min_cells: int, row_classes=None, required=()) -> list:
+    """
+    Registros de la tabla 'items' de una página (lista vacía si no hay).
+    Las filas sin valor en alguna columna de `required` se saltan.
+    """
+    table = find_items_table(tree)
+    if table is None:
+        print("      ❌ No hay tabla 'items' en esta página, la salto.")
+        return []
+
+    rows = table_rows(table, row_classes=row_classes)
+    if not rows:
+        print("      ❌ Sin filas de datos en esta página, la salto.")
+        return []
+
+    page_records = [
+        r for r in extract_records(rows, columns, min_cells)
+        if all(r[name] is not None for name in required)
+    ]
+    print(f"      ✔ Registros en esta página: {len(page_records)}")
+    return page_records
+
+
+def scrape_paginated_season(season_id: int, page_url, columns, min_cells: int,
+                            row_classes=None, required=(), loose_pagination: bool = False) -> pd.DataFrame:
+    """
+    Todas las páginas de un listado de UNA temporada, con las columnas de
+    `columns` más Season_id/Season. page_url(season_id, page) da la URL de
+    cada página. Si falla cualquier página se lanza PageUnavailable.
+    """
+    season_str = season_label_from_year(season_id)
+    print(f"\n🌍 Temporada {season_str} (saison_id={season_id})")
+
+    def parse(tree):
+        return [
+            {"Season_id": season_id, "Season": season_str, **r}
+            for r in parse_page(tree, columns, min_cells, row_classes, required)
+        ]
+
+    # La página 1 se descarga una sola vez: sirve para el paginador y para sus filas
+    tree = fetch_page(page_url, season_id, 1)
+    last_page = get_last_page(tree, season_id, loose=loose_pagination)
+    first_records = parse(tree)
+
+    # Páginas 2..N en paralelo (el limitador de fetch() marca el ritmo),
+    # unidas en orden de página para que el CSV sea determinista
+    other_pages = run_jobs(
+        lambda page: parse(fetch_page(page_url, season_id, page)),
+        range(2, last_page + 1), max_workers=PAGE_WORKERS,
+    )
+    all_records = first_records + [r for page_records in other_pages for r in page_records]
+
+    if not all_records:
+        print(f"   ⚠️ Sin datos para la temporada {season_str}")
+        return pd.DataFrame()
+
+    df = pd.DataFrame(all_records)
+    print(f"   ✅ Total registros temporada {season_str}: {df.shape[0]}")
+    return df
@@ -1,27 +1,122 @@
 # utils.py
+import codecs
 import os
 import pandas as pd
 import glob
 import json
+from itertools import islice
 from unidecode import unidecode
 from fuzzywuzzy import process
 
 def list_csv(folder):
     return sorted(glob.glob(os.path.join(folder, "*.csv")))
 
-def read_csv_safe(path):
+# Columnas de texto por familia de CSV (prefijo del fichero): se leen como str
+# sin que pandas tenga que inferir su tipo
+CSV_TEXT_COLUMNS = {
+    "champions_": [
+        "Stage", "Date", "Time", "HomeTeam", "HomeTeamCountry",
+        "AwayTeam", "AwayTeamCountry", "Score",
+    ],
+    "tfmkt_": [
+        "Season", "Player", "Player_url", "Position", "Club", "Club_url",
+        "Nationalities", "Nationality", "Country", "Clubs_info", "Club_info",
+        "HomeTeam", "AwayTeam", "Result_raw",
+    ],
+    "ucl_clubs_": [
+        "team_code", "team_name_en", "team_name_es", "country_en", "country_es",
+    ],
+    "ucl_players_": [
+        "team_code", "team_name_en", "team_name_es", "country_en", "country_es",
+        "player_name", "player_birth_date", "player_country_code",
+        "player_birth_country_code", "player_gender", "player_field_position",
+        "player_detailed_field_position", "club_shirt_name",
+    ],
+    "ucl_matches_": ["Season", "Home_team", "Away_team", "Score"],
+}
+
+# Bytes que se miran para adivinar la codificación (no se decodifica el fichero entero)
+SNIFF_BYTES = 64 * 1024
+
+def sniff_encoding(path, nbytes=SNIFF_BYTES):
+    # BOM en los primeros bytes; si no hay, se valida UTF-8 sobre un prefijo
+    # acotado y si falla, latin1. Un byte no UTF-8 más allá del prefijo lo
+    # resuelve read_csv_safe
+    with open(path, "rb") as f:
+        head = f.read(nbytes)
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # final=False: un carácter multibyte cortado al final del prefijo no es error
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return "latin1"
+    return "utf-8"
+
+def csv_dtypes(path):
+    name = os.path.basename(path)
+    for prefix, cols in CSV_TEXT_COLUMNS.items():
+        if name.startswith(prefix):
+            return {c: str for c in cols}
+    return None
+
+def read_csv_safe(path, usecols=None, nrows=None, encoding=None):
+    # Un solo parseo, con la codificación detectada (o la que se pase) y los
+    # tipos de su familia; solo si el prefijo engañó se relee en latin1
+    encoding = encoding or sniff_encoding(path)
+    kwargs = dict(dtype=csv_dtypes(path), usecols=usecols, nrows=nrows)
     try:
-        return pd.read_csv(path, encoding="utf-8")
-    except:
-        return pd.read_csv(path, encoding="latin1")
+        return pd.read_csv(path, encoding=encoding, **kwargs)
+    except UnicodeDecodeError:
+        return pd.read_csv(path, encoding="latin1", **kwargs)
+
+def fold_text(s):
+    # Sin acentos ni mayúsculas: "Abédi" -> "abedi", "1–2" -> "1-2"
+    return unidecode(str(s)).lower()
 
 def normalize_name(s):
     if pd.isna(s): return ""
-    s2 = unidecode(str(s)).lower().strip()
+    s2 = fold_text(s).strip()
     s2 = s2.replace("fc ", "").replace("cf ", "").replace("ac ", "")
     return s2
 
+# Siglas de club que sobran al principio o al final del nombre
+TEAM_AFFIXES = {"fc", "cf", "ac", "afc"}
+
+def normalize_team(s):
+    # "AFC Ajax" -> "ajax", "Real Madrid CF" -> "real madrid", "AC Milan" -> "milan";
+    # solo palabras enteras en los extremos (no toca "Olympiacos" ni "Atlético")
+    if pd.isna(s): return ""
+    words = fold_text(s).replace(".", "").split()
+    while len(words) > 1 and words[0] in TEAM_AFFIXES:
+        words.pop(0)
+    while len(words) > 1 and words[-1] in TEAM_AFFIXES:
+        words.pop()
+    return " ".join(words)
+
 def save_jsonl(path, records):
+    # records puede ser cualquier iterable (también un generador); devuelve cuántos escribe
+    n = 0
     with open(path, "w", encoding="utf-8") as f:
         for r in records:
             f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+def iter_jsonl(path):
+    # Lectura en streaming: un registro cada vez
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def batched(iterable, n):
+    # Lotes de tamaño fijo (el último puede ser más corto)
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, n))
+        if not batch:
+            return
+        yield batch